@@ -7,19 +7,26 @@ from requests.structures import CaseInsensitiveDict
 
 from tornado.httpclient import AsyncHTTPClient
 
+from . import Metrics
 from .AppConfig import AppConfig, Expose
 from .Config import Config
 from .Containers import Containers
 from .Exceptions import StoryscriptError
 from .Logger import Logger
+from .Profiler import Profiler
 from .Stories import Stories
+from .StoryProgram import StoryProgram
 from .Types import StreamingService
 from .constants.ServiceConstants import ServiceConstants
 from .entities.Release import Release
 from .processing import Story
 from .processing.Services import Command, Service, Services
 from .utils import Dict
+from .utils.Bulkhead import Bulkhead
 from .utils.HttpUtils import HttpUtils
+from .utils.ReadOnlyDict import ReadOnlyDict
+from .utils.SingleFlight import SingleFlight
+from .utils.TTLCache import TTLCache
 
 Subscription = namedtuple('Subscription',
                           ['streaming_service', 'id', 'payload', 'event'])
@@ -54,6 +61,41 @@ class App:
         self.app_config = app_data.app_config
         self.version = release.version
         self.logger = app_data.logger
+        sample_rate = self.app_config.get_log_sample_rate()
+        if sample_rate is not None:
+            self.logger.sample_rate = sample_rate
+
+        self.profiler = None
+        if self.app_config.get_profiling() is True:
+            self.profiler = Profiler(self.app_id)
+
+        self.results_retention = self.app_config.get_results_retention() \
+            or self.config.STORY_RESULTS_RETENTION
+        self.results_timings_size = int(
+            self.app_config.get_results_timings_size()
+            or self.config.STORY_RESULTS_TIMINGS_SIZE)
+        self.story_timeout = float(self.config.STORY_TIMEOUT)
+        self.runs = set()
+        """
+        The tasks of the stories being run (see Story#run).
+        """
+        self.longest_slice = 0
+        """
+        The longest slice of any story of this app (see Story#yield_slice).
+        """
+        self.bulkheads = {}
+        """
+        The bulkheads of services, or None for services whose calls
+        aren't limited (see App#get_bulkhead).
+        """
+        self.single_flight = None
+        if self.app_config.get_coalesce_calls() is True:
+            self.single_flight = SingleFlight()
+        self.responses = TTLCache(int(self.config.RESPONSE_CACHE_SIZE))
+        """
+        The outputs of cached service calls (see App#get_cache_ttl).
+        """
+
         self.owner_uuid = release.owner_uuid
         self.owner_email = release.owner_email
         self.environment = release.environment
@@ -65,17 +107,25 @@ class App:
         self.environment = CaseInsensitiveDict(data=self.environment)
         self.stories = release.stories['stories']
         self.entrypoint = release.stories['entrypoint']
+        self.programs = {}
+        concurrent_calls = self.app_config.get_concurrent_calls()
+        function_cache_size = int(self.config.FUNCTION_CACHE_SIZE)
+        for story_name, story in self.stories.items():
+            self.programs[story_name] = StoryProgram.compile(
+                story, concurrent_calls=concurrent_calls,
+                function_cache_size=function_cache_size)
+
         self.services = app_data.services
         self.always_pull_images = release.always_pull_images
         secrets = CaseInsensitiveDict()
         for k, v in self.environment.items():
             if not isinstance(v, dict):
                 secrets[k] = v
-        self.app_context = {
+        self.app_context = ReadOnlyDict({
             'secrets': secrets,
             'hostname': f'{self.app_dns}.{self.config.APP_DOMAIN}',
             'version': self.version
-        }
+        })
 
     def image_pull_policy(self):
         if self.always_pull_images is True:
@@ -245,10 +295,72 @@ class App:
             else:
                 self.logger.error(f'Failed to unsubscribe {sub}!')
 
+    def get_story_timeout(self, story_name: str):
+        """
+        The number of seconds which a run of story_name may take, or None
+        if runs of it may take as long as they need.
+        """
+        timeout = self.app_config.get_story_timeout(story_name)
+        if timeout is None:
+            timeout = self.story_timeout
+
+        return timeout or None
+
+    def get_bulkhead(self, service: str):
+        """
+        Returns the bulkhead limiting the calls to service in flight (and
+        waiting), or None if they aren't limited.
+        """
+        try:
+            return self.bulkheads[service]
+        except KeyError:
+            pass
+
+        concurrency, queue_size = self.app_config.get_bulkhead(service)
+        if concurrency is None:
+            concurrency = int(self.config.SERVICE_CONCURRENCY)
+        if queue_size is None:
+            queue_size = int(self.config.SERVICE_QUEUE_SIZE)
+
+        bulkhead = None
+        if concurrency > 0:
+            bulkhead = Bulkhead(concurrency, queue_size)
+
+        self.bulkheads[service] = bulkhead
+        return bulkhead
+
+    def get_cache_ttl(self, service: str, command: str, command_conf: dict):
+        """
+        Returns the number of seconds for which the outputs of command of
+        service are cached, or None if they aren't. Caching is configured
+        either in asyncy.yaml, or by the service (cache.ttl of the action).
+        """
+        ttl = self.app_config.get_cache_ttl(service, command)
+        if ttl is None:
+            ttl = Dict.find(command_conf, 'cache.ttl')
+
+        if ttl is None or ttl <= 0:
+            return None
+
+        return ttl
+
+    def cancel_runs(self):
+        """
+        Cancels the stories which are still being run.
+        """
+        for task in list(self.runs):
+            task.cancel()
+        self.runs.clear()
+
     async def destroy(self):
         """
-        Unsubscribe from all existing subscriptions,
-        and delete the namespace.
+        Cancel the stories being run, unsubscribe from all existing
+        subscriptions, and delete the namespace.
         """
+        self.cancel_runs()
+        if self.longest_slice > 0:
+            Metrics.story_longest_slice_seconds.remove(self.app_id)
+            self.longest_slice = 0
+
         await self.clear_subscriptions_synapse()
         await self.unsubscribe_all()
@@ -2,18 +2,100 @@
 import typing
 from collections import namedtuple
 
+from .enums.ResultRetention import ResultRetention
 from .utils.Dict import Dict
 
 Expose = namedtuple('Expose',
                     ['service', 'service_expose_name', 'http_path'])
 
 KEY_EXPOSE = 'expose'
+KEY_LOG_SAMPLE_RATE = 'logging.sample_rate'
+KEY_RESULTS_RETENTION = 'results.retention'
+KEY_RESULTS_TIMINGS_SIZE = 'results.timings_size'
+KEY_PARALLEL_LOOPS = 'loops.parallel'
+KEY_CONCURRENT_CALLS = 'calls.concurrent'
+KEY_COALESCE_CALLS = 'calls.coalesce'
+KEY_PROFILING = 'profiling.enabled'
+KEY_DEFAULT_TIMEOUT = 'timeouts.default'
+KEY_STORY_TIMEOUTS = 'timeouts.stories'
+KEY_BULKHEADS = 'bulkheads'
+KEY_CACHE = 'cache'
 
 
 class AppConfig:
     _expose: typing.List[Expose] = None
+    _log_sample_rate: typing.Optional[float] = None
+    _results_retention: typing.Optional[ResultRetention] = None
+    _results_timings_size: typing.Optional[int] = None
+    _loop_concurrency: typing.Dict[str, int] = None
+    _concurrent_calls: bool = False
+    _coalesce_calls: bool = False
+    _profiling: bool = False
+    _default_timeout: typing.Optional[float] = None
+    _story_timeouts: typing.Dict[str, float] = None
+    _bulkheads: typing.Dict[str, tuple] = None
+    _cache_ttls: typing.Dict[tuple, float] = None
 
     def __init__(self, raw: dict):
+        sample_rate = Dict.find(raw, KEY_LOG_SAMPLE_RATE)
+        if sample_rate is not None:
+            sample_rate = float(sample_rate)
+            assert 0 <= sample_rate <= 1
+            self._log_sample_rate = sample_rate
+
+        retention = Dict.find(raw, KEY_RESULTS_RETENTION)
+        if retention is not None:
+            self._results_retention = ResultRetention(retention)
+
+        timings_size = Dict.find(raw, KEY_RESULTS_TIMINGS_SIZE)
+        if timings_size is not None:
+            timings_size = int(timings_size)
+            assert timings_size > 0
+            self._results_timings_size = timings_size
+
+        self._loop_concurrency = {}
+        parallel_loops = Dict.find(raw, KEY_PARALLEL_LOOPS) or {}
+        for key, concurrency in parallel_loops.items():
+            concurrency = int(concurrency)
+            assert concurrency > 0
+            self._loop_concurrency[str(key)] = concurrency
+
+        self._concurrent_calls = Dict.find(raw, KEY_CONCURRENT_CALLS) is True
+        self._coalesce_calls = Dict.find(raw, KEY_COALESCE_CALLS) is True
+        self._profiling = Dict.find(raw, KEY_PROFILING) is True
+
+        default_timeout = Dict.find(raw, KEY_DEFAULT_TIMEOUT)
+        if default_timeout is not None:
+            default_timeout = float(default_timeout)
+            assert default_timeout > 0
+            self._default_timeout = default_timeout
+
+        self._story_timeouts = {}
+        story_timeouts = Dict.find(raw, KEY_STORY_TIMEOUTS) or {}
+        for story_name, timeout in story_timeouts.items():
+            timeout = float(timeout)
+            assert timeout > 0
+            self._story_timeouts[story_name] = timeout
+
+        self._bulkheads = {}
+        for service, bulkhead in (raw.get(KEY_BULKHEADS) or {}).items():
+            concurrency = bulkhead.get('concurrency')
+            if concurrency is not None:
+                concurrency = int(concurrency)
+                assert concurrency > 0
+            queue_size = bulkhead.get('queue')
+            if queue_size is not None:
+                queue_size = int(queue_size)
+                assert queue_size >= 0
+            self._bulkheads[service] = (concurrency, queue_size)
+
+        self._cache_ttls = {}
+        for service, commands in (raw.get(KEY_CACHE) or {}).items():
+            for command, ttl in commands.items():
+                ttl = float(ttl)
+                assert ttl >= 0
+                self._cache_ttls[(service, command)] = ttl
+
         self._expose = []
         for expose in raw.get(KEY_EXPOSE, []):
             e = Expose(service=expose.get('service'),
@@ -27,3 +109,94 @@ class AppConfig:
 
     def get_expose_config(self):
         return self._expose
+
+    def get_log_sample_rate(self):
+        """
+        The fraction of story execution logs to keep (see Logger#hot), or
+        None if it's not configured.
+        """
+        return self._log_sample_rate
+
+    def get_results_retention(self):
+        """
+        What's retained about the lines executed (see LineResults), or None
+        if it's not configured.
+        """
+        return self._results_retention
+
+    def get_results_timings_size(self):
+        """
+        The number of line timings retained per run, or None if it's not
+        configured.
+        """
+        return self._results_timings_size
+
+    def get_loop_concurrency(self, story_name: str, line_number: str):
+        """
+        The number of iterations of the for loop at line_number which
+        may run concurrently (see Lexicon#for_loop_parallel).
+
+        Loops are configured in asyncy.yaml (loops.parallel), either for
+        a whole story ("<story>": N) or for one line ("<story>:<line>": N).
+        """
+        if len(self._loop_concurrency) == 0:
+            return 1
+
+        concurrency = self._loop_concurrency.get(f'{story_name}:{line_number}')
+        if concurrency is None:
+            concurrency = self._loop_concurrency.get(story_name, 1)
+
+        return concurrency
+
+    def get_concurrent_calls(self) -> bool:
+        """
+        Whether consecutive service calls which don't depend on each other
+        execute concurrently (see StoryProgram#group_calls).
+        """
+        return self._concurrent_calls
+
+    def get_coalesce_calls(self) -> bool:
+        """
+        Whether identical calls to idempotent service actions which are in
+        flight at once share a response (see Services#fetch).
+        """
+        return self._coalesce_calls
+
+    def get_profiling(self) -> bool:
+        """
+        Whether the time spent executing every line is profiled
+        (see Profiler).
+        """
+        return self._profiling
+
+    def get_story_timeout(self, story_name: str):
+        """
+        The number of seconds which a run of story_name may take (see
+        Story#run), or None if it's not configured.
+
+        Budgets are configured in asyncy.yaml, either for all stories
+        (timeouts.default) or for one story (timeouts.stories.<story>).
+        """
+        return self._story_timeouts.get(story_name, self._default_timeout)
+
+    def get_bulkhead(self, service: str):
+        """
+        The number of calls to service which may be in flight at once, and
+        the number of calls which may wait for them (see App#get_bulkhead).
+        Either is None if it's not configured.
+
+        Bulkheads are configured in asyncy.yaml, per service
+        (bulkheads.<service>.concurrency and bulkheads.<service>.queue).
+        """
+        return self._bulkheads.get(service, (None, None))
+
+    def get_cache_ttl(self, service: str, command: str):
+        """
+        The number of seconds for which responses of the command of service
+        are cached (see Services#execute_http), or None if it's not
+        configured.
+
+        Caching is configured in asyncy.yaml, per command
+        (cache.<service>.<command>: ttl).
+        """
+        return self._cache_ttls.get((service, command))
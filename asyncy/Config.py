@@ -11,6 +11,17 @@ class Config:
         'ASYNCY_SYNAPSE_PORT': 80,
         'LOGGER_NAME': 'storyscript',
         'LOGGER_LEVEL': 'debug',
+        'LOGGER_SAMPLE_RATE': 1,
+        'STORY_RESULTS_RETENTION': 'full',
+        'STORY_RESULTS_TIMINGS_SIZE': 1024,
+        'FUNCTION_CACHE_SIZE': 1024,
+        'STORY_SLICE_SECONDS': 0.05,
+        'STORY_TIMEOUT': 0,
+        'HTTP_MAX_CLIENTS': 256,
+        'HTTP_MAX_HOST_CONNECTIONS': 32,
+        'SERVICE_CONCURRENCY': 0,
+        'SERVICE_QUEUE_SIZE': 128,
+        'RESPONSE_CACHE_SIZE': 16 * 1024 * 1024,
         'INGRESS_GLOBAL_STATIC_IP_NAME': 'storyscript-and-storyscriptapp',
         'APP_DOMAIN': 'storyscriptapp.com',
         'POSTGRES': 'options='
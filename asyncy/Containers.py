@@ -154,7 +154,7 @@ class Containers:
                         f'{expose.http_path}')
 
     @classmethod
-    async def start(cls, story, line):
+    async def start(cls, story, line, container_name=None):
         """
         Creates and starts a container as declared by line['service'].
 
@@ -162,10 +162,11 @@ class Containers:
         """
         service = line[LineConstants.service]
         story.logger.info(f'Starting container {service}')
-        container_name = cls.get_container_name(story.app, story.name,
-                                                line, service)
+        if container_name is None:
+            container_name = cls.get_container_name(story.app, story.name,
+                                                    line, service)
         await cls.create_and_start(story.app, line, service, container_name)
-        hostname = await cls.get_hostname(story, line, service)
+        hostname = Kubernetes.get_hostname(story.app, container_name)
 
         ss = StreamingService(name=service, command=line['command'],
                               container_name=container_name,
@@ -54,6 +54,20 @@ class TypeValueRuntimeError(StoryscriptRuntimeError):
             f'{type_expected} with `{value}`')
 
 
+class StoryTimeoutError(StoryscriptRuntimeError):
+    def __init__(self, story_name, timeout):
+        super().__init__(
+            message=f'Story "{story_name}" has been cancelled, since it '
+            f'ran for longer than its budget of {timeout}s')
+
+
+class ServiceSaturatedError(StoryscriptRuntimeError):
+    def __init__(self, service):
+        super().__init__(
+            message=f'Service "{service}" has too many calls in flight '
+            f'and waiting already')
+
+
 class InvalidKeywordUsage(StoryscriptError):
     def __init__(self, story, line, keyword):
         super().__init__(message=f'Invalid usage of keyword "{keyword}".',
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import time
+from array import array
+
+from .enums.ResultRetention import ResultRetention
+
+
+class LineResults:
+    """
+    The results of the lines executed by a story, for one run of it.
+
+    This retains nothing (see ResultRetention.OFF). See LineTimings and
+    FullLineResults for the others.
+    """
+    __slots__ = ()
+
+    @staticmethod
+    def new(retention, timings_size: int):
+        if retention == ResultRetention.OFF:
+            return LineResults()
+        elif retention == ResultRetention.TIMINGS:
+            return LineTimings(timings_size)
+
+        return FullLineResults()
+
+    def start(self, line_number):
+        pass
+
+    def end(self, line_number, output):
+        pass
+
+    def merge(self, results):
+        """
+        Adds the results of another run (of the same kind) to these.
+        """
+        pass
+
+
+class LineTimings(LineResults):
+    """
+    Retains when the last size lines started and ended, in a ring buffer
+    (see ResultRetention.TIMINGS). Outputs aren't retained.
+    """
+    __slots__ = ('size', 'count', 'line_numbers', 'starts', 'ends',
+                 '_started')
+
+    def __init__(self, size: int):
+        assert size > 0
+        self.size = size
+        self.count = 0
+        """
+        The number of lines which have ended, including those which
+        aren't retained anymore.
+        """
+        self.line_numbers = []
+        self.starts = array('d')
+        self.ends = array('d')
+        self._started = {}
+        """
+        The starts of the lines which haven't ended yet, as a stack per
+        line, since a line may start again before it ends (in a function
+        which calls itself).
+        """
+
+    def start(self, line_number):
+        self._started.setdefault(line_number, []).append(time.time())
+
+    def end(self, line_number, output):
+        end = time.time()
+        starts = self._started.get(line_number)
+        if not starts:
+            self.add(line_number, end, end)
+            return
+
+        start = starts.pop()
+        if len(starts) == 0:
+            del self._started[line_number]
+
+        self.add(line_number, start, end)
+
+    def add(self, line_number, start: float, end: float):
+        if len(self.starts) < self.size:
+            self.line_numbers.append(line_number)
+            self.starts.append(start)
+            self.ends.append(end)
+        else:
+            i = self.count % self.size
+            self.line_numbers[i] = line_number
+            self.starts[i] = start
+            self.ends[i] = end
+
+        self.count += 1
+
+    def timings(self):
+        """
+        Returns (line_number, start, end) for all lines retained, in the
+        order they ended.
+        """
+        first = self.count % self.size if len(self.starts) == self.size else 0
+        order = list(range(first, len(self.starts))) + list(range(first))
+        return [(self.line_numbers[i], self.starts[i], self.ends[i])
+                for i in order]
+
+    def merge(self, results):
+        for line_number, start, end in results.timings():
+            self.add(line_number, start, end)
+
+
+class FullLineResults(LineResults, dict):
+    """
+    Retains when the last run of every line started and ended, and its
+    output (see ResultRetention.FULL).
+    """
+    __slots__ = ()
+
+    def start(self, line_number):
+        self[line_number] = {'start': time.time()}
+
+    def end(self, line_number, output):
+        start = self[line_number]['start']
+        self[line_number] = {'output': output, 'end': time.time(),
+                             'start': start}
+
+    def merge(self, results):
+        self.update(results)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import json
 import os
+import random
 import traceback
 from distutils.util import strtobool
 from logging import Formatter, LoggerAdapter, StreamHandler, getLevelName
@@ -72,17 +73,30 @@ class Logger:
         ('lexicon-if', 'debug',
          'Processing line {} with "if" method against context {}'),
         ('story-execution', 'debug', 'Received line "{}" from handler'),
-        ('story-resolve', 'debug', 'Resolved "{}" to "{}"'),
+        ('story-resolve', 'debug', 'Resolved "{}" to "{}" with type {}'),
         ('lexicon-unless', 'debug',
          'Processing line {} with "unless" method against context {}'),
         ('service-init', 'info', 'Starting Asyncy version {}'),
         ('http-init', 'info', 'HTTP server bound to port {}'),
         ('http-request-run-story', 'debug',
          'Received run request for story {} via HTTP'),
+        ('lexicon-mutation', 'debug', 'Mutation result: {}'),
+        ('service-invoke', 'debug',
+         'Invoking service on {} with payload {}'),
     ]
 
+    sample_rate: float = 1
+    """
+    The fraction of hot events which are logged (see Logger#hot).
+    """
+
     def __init__(self, config):
         self.frustum = Frustum(config.LOGGER_NAME, config.LOGGER_LEVEL)
+        self.sample_rate = float(config.LOGGER_SAMPLE_RATE or 1)
+        self.levels = {
+            event: getLevelName(level.upper())
+            for event, level, _ in self.events
+        }
 
     def adapter(self, app_id, version):
         return Adapter(self.frustum.logger,
@@ -108,6 +122,21 @@ class Logger:
     def log(self, event, *args):
         self.frustum.log(event, *args)
 
+    def hot(self, event, *args):
+        """
+        Logs an event which is raised for every line (or argument) executed.
+
+        Nothing is formatted unless the level of the event is enabled, and
+        only sample_rate of these events are logged.
+        """
+        if not self.frustum.logger.isEnabledFor(self.levels[event]):
+            return
+
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+
+        self.frustum.log(event, *args)
+
     def info(self, message):
         getattr(self.frustum.logger, 'info')(message)
 
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from prometheus_client import Summary
+from prometheus_client import Counter, Gauge, Histogram, Summary
 
 
 story_request = Summary(
@@ -37,3 +37,78 @@ container_start_seconds_total = Summary(
     'Time spent executing commands in containers',
     ['app_id', 'story_name', 'service']
 )
+
+function_cache_hits = Counter(
+    'asyncy_engine_function_cache_hits',
+    'Calls to pure functions answered from the cache',
+    ['app_id', 'story_name', 'function']
+)
+
+function_cache_misses = Counter(
+    'asyncy_engine_function_cache_misses',
+    'Calls to pure functions which were executed and cached',
+    ['app_id', 'story_name', 'function']
+)
+
+line_self_seconds = Histogram(
+    'asyncy_engine_line_self_seconds',
+    'Time spent executing a line, excluding the lines of its block '
+    '(only for apps with profiling enabled)',
+    ['app_id', 'story_name', 'line']
+)
+
+line_service_seconds = Histogram(
+    'asyncy_engine_line_service_seconds',
+    'Time spent in service calls while executing a line '
+    '(only for apps with profiling enabled)',
+    ['app_id', 'story_name', 'line']
+)
+
+story_slice_seconds = Summary(
+    'asyncy_engine_story_slice_seconds',
+    'Time a story executed for without yielding to the event loop',
+    ['app_id']
+)
+
+story_longest_slice_seconds = Gauge(
+    'asyncy_engine_story_longest_slice_seconds',
+    'The longest time a story executed for without yielding to the '
+    'event loop',
+    ['app_id']
+)
+
+http_queue_seconds = Histogram(
+    'asyncy_engine_http_queue_seconds',
+    'Time a request waited for a connection to its host to be available'
+)
+
+service_calls_waiting = Gauge(
+    'asyncy_engine_service_calls_waiting',
+    'Calls to a service waiting for others to complete (see bulkheads)',
+    ['app_id', 'service']
+)
+
+service_calls_rejected = Counter(
+    'asyncy_engine_service_calls_rejected',
+    'Calls to a service rejected, since too many were in flight and '
+    'waiting already',
+    ['app_id', 'service']
+)
+
+response_cache_hits = Counter(
+    'asyncy_engine_response_cache_hits',
+    'Calls to a service answered from the cache',
+    ['app_id', 'service']
+)
+
+response_cache_misses = Counter(
+    'asyncy_engine_response_cache_misses',
+    'Calls to a service which were made and cached',
+    ['app_id', 'service']
+)
+
+response_cache_bytes = Gauge(
+    'asyncy_engine_response_cache_bytes',
+    'Size of the responses of services cached',
+    ['app_id']
+)
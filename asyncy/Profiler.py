@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import time
+
+from . import Metrics
+
+
+class LineProfile:
+    """
+    The time spent executing a line, across all runs of its story.
+
+    self_time excludes the time spent executing the lines of its block
+    (if any), and service_time is the part of it spent in service calls.
+    """
+    __slots__ = ('calls', 'wall_time', 'self_time', 'service_time',
+                 'max_time')
+
+    def __init__(self):
+        self.calls = 0
+        self.wall_time = 0.0
+        self.self_time = 0.0
+        self.service_time = 0.0
+        self.max_time = 0.0
+
+
+class ProfileFrame:
+    """
+    A line being executed (see Profiler#enter).
+    """
+    __slots__ = ('key', 'start', 'children_time', 'service_time', 'parent')
+
+    def __init__(self, key: tuple, parent):
+        self.key = key
+        self.start = time.time()
+        self.children_time = 0.0
+        self.service_time = 0.0
+        self.parent = parent
+
+
+class Profiler:
+    """
+    Aggregates the time spent executing every line of the stories of
+    an app, when profiling is enabled for it (see AppConfig).
+    """
+
+    def __init__(self, app_id: str):
+        self.app_id = app_id
+        self.lines = {}
+        """
+        LineProfiles, keyed by (story_name, line_number).
+        """
+
+    def enter(self, story, line_number):
+        """
+        Marks the start of executing line_number, and returns the frame
+        which has to be passed to Profiler#exit when it's done.
+        """
+        frame = ProfileFrame((story.name, line_number),
+                             story.run.profile_frame)
+        story.run.profile_frame = frame
+        return frame
+
+    def exit(self, story, frame: ProfileFrame):
+        wall_time = time.time() - frame.start
+        # Lines of a block might run concurrently (see Lexicon#for_loop).
+        self_time = max(0.0, wall_time - frame.children_time)
+
+        story.run.profile_frame = frame.parent
+        if frame.parent is not None:
+            frame.parent.children_time += wall_time
+
+        profile = self.lines.get(frame.key)
+        if profile is None:
+            profile = self.lines[frame.key] = LineProfile()
+
+        profile.calls += 1
+        profile.wall_time += wall_time
+        profile.self_time += self_time
+        profile.service_time += frame.service_time
+        profile.max_time = max(profile.max_time, wall_time)
+
+        story_name, line_number = frame.key
+        Metrics.line_self_seconds.labels(
+            app_id=self.app_id, story_name=story_name, line=line_number
+        ).observe(self_time)
+        if frame.service_time > 0:
+            Metrics.line_service_seconds.labels(
+                app_id=self.app_id, story_name=story_name, line=line_number
+            ).observe(frame.service_time)
+
+    @staticmethod
+    def service_time(story, seconds: float):
+        """
+        Adds time spent calling a service to the line being executed,
+        if it's being profiled.
+        """
+        frame = story.run.profile_frame
+        if frame is not None:
+            frame.service_time += seconds
+
+    def report(self, limit: int = None):
+        """
+        Returns the profiles of the lines which took the most time
+        (excluding their blocks) first.
+        """
+        items = sorted(self.lines.items(),
+                       key=lambda item: item[1].self_time, reverse=True)
+        if limit is not None:
+            items = items[:limit]
+
+        return [{
+            'story_name': story_name,
+            'line': line_number,
+            'calls': profile.calls,
+            'wall_time': profile.wall_time,
+            'self_time': profile.self_time,
+            'service_time': profile.service_time,
+            'max_time': profile.max_time,
+            'mean_time': profile.wall_time / profile.calls
+        } for (story_name, line_number), profile in items]
+
+    def reset(self):
+        self.lines = {}
@@ -16,9 +16,12 @@ from .Apps import Apps
 from .Config import Config
 from .Logger import Logger
 from .Sentry import Sentry
+from .http_handlers.ProfileHandler import ProfileHandler
 from .http_handlers.StoryEventHandler import StoryEventHandler
+from .processing import Story
 from .processing.Services import Services
 from .processing.internal import File, Http, Json, Log
+from .utils.HttpUtils import HttpUtils
 
 _ONE_DAY_IN_SECONDS = 60 * 60 * 24
 
@@ -56,6 +59,9 @@ class Service:
         global server
 
         Services.set_logger(logger)
+        Story.slice_seconds = float(config.STORY_SLICE_SECONDS)
+        HttpUtils.configure(logger, int(config.HTTP_MAX_CLIENTS),
+                            int(config.HTTP_MAX_HOST_CONNECTIONS))
 
         # Init internal services.
         File.init()
@@ -69,7 +75,8 @@ class Service:
         signal.signal(signal.SIGINT, Service.sig_handler)
 
         web_app = tornado.web.Application([
-            (r'/story/event', StoryEventHandler, {'logger': logger})
+            (r'/story/event', StoryEventHandler, {'logger': logger}),
+            (r'/profile', ProfileHandler, {'logger': logger})
         ], debug=debug)
 
         config.ENGINE_PORT = port
@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
+import copy
 import pathlib
-import time
-import uuid
 from contextlib import contextmanager
 from json import dumps
 
+from .LineResults import LineResults
+from .StoryProgram import StoryProgram
+from .StoryRun import StoryRun
 from .utils import Dict
+from .utils.ReadOnlyDict import ReadOnlyDict
 from .utils.Resolver import Resolver
-from .utils.StringUtils import StringUtils
+from .utils.StringUtils import StringUtils, Truncated
 
 MAX_BYTES_LOGGING = 160
 
@@ -18,34 +21,126 @@ class Stories:
         self.app = app
         self.name = story_name
         self.logger = logger
-        self.tree = app.stories[story_name]['tree']
-        self.entrypoint = app.stories[story_name]['entrypoint']
-        self.results = {}
-        self.environment = None
-        self.context = None
-        self.containers = None
-        self.repository = None
-        self.version = None
-        self._stack = []
-        self.execution_id = str(uuid.uuid4())
-        self._tmp_dir_created = False
+        self.program = app.programs.get(story_name)
+        if not isinstance(self.program, StoryProgram):
+            # This story wasn't compiled ahead of time (by App).
+            self.program = StoryProgram.compile(app.stories[story_name])
+        self.entrypoint = self.program.entrypoint
+        self.run = StoryRun.acquire()
+        self.run.results = LineResults.new(app.results_retention,
+                                           app.results_timings_size)
+
+    def release(self):
+        """
+        Releases the state of this run of the story (see StoryRun#release).
+        This story may not be used afterwards.
+        """
+        self.run.release()
+        self.run = None
+
+    def fork(self, context):
+        """
+        Returns a copy of this story with a run of its own, which starts
+        with the stack of this run, and context (see Lexicon#for_loop).
+        """
+        story = copy.copy(self)
+        story.run = StoryRun.acquire()
+        story.run.context = context
+        story.run.environment = self.run.environment
+        story.run.results = LineResults.new(self.app.results_retention,
+                                            self.app.results_timings_size)
+        story.run.stack.extend(self.run.stack)
+        story.run.tmp_dir_created = self.run.tmp_dir_created
+        story.run.profile_frame = self.run.profile_frame
+        story.run.slice_start = self.run.slice_start
+        story.run.execution_id = self.run.execution_id
+        return story
+
+    def join(self, fork, base=None, exclude=None):
+        """
+        Copies the variables which fork assigned (other than exclude) and
+        the results of its lines back to this story, and releases it.
+
+        base is the context which fork started from, if it was a copy of
+        the context of this story. Only the variables which differ from
+        it are copied back, so that forks joined one after another don't
+        overwrite what an earlier one assigned with their stale copy.
+        """
+        context = self.context
+        if base is None:
+            base = context
+
+        for key, value in fork.context.items():
+            if key != exclude and \
+                    (key not in base or base[key] is not value):
+                context[key] = value
+
+        self.run.results.merge(fork.run.results)
+        self.run.tmp_dir_created |= fork.run.tmp_dir_created
+        fork.release()
+
+    @property
+    def context(self):
+        return self.run.context
+
+    @context.setter
+    def context(self, context):
+        self.run.context = context
+
+    @property
+    def environment(self):
+        return self.run.environment
+
+    @environment.setter
+    def environment(self, environment):
+        self.run.environment = environment
+
+    @property
+    def results(self):
+        return self.run.results
+
+    @results.setter
+    def results(self, results):
+        self.run.results = results
+
+    @property
+    def execution_id(self):
+        return self.run.execution_id
+
+    @execution_id.setter
+    def execution_id(self, execution_id):
+        self.run.execution_id = execution_id
+
+    @property
+    def tree(self):
+        return self.program.tree
+
+    @tree.setter
+    def tree(self, tree):
+        """
+        Replaces the tree of this story, compiling it into a new program.
+        """
+        self.program = StoryProgram.compile({
+            'tree': tree,
+            'entrypoint': self.entrypoint
+        })
 
     @contextmanager
     def new_frame(self, line_number: str):
         # No need for a try/finally block, since we don't want to unwind
         # the stack when an exception occurs.
-        self._stack.append(line_number)
+        self.run.stack.append(line_number)
         yield
-        self._stack.pop()
+        self.run.stack.pop()
 
     def get_stack(self) -> []:
-        return self._stack
+        return self.run.stack
 
     def create_tmp_dir(self):
-        if self._tmp_dir_created:
+        if self.run.tmp_dir_created:
             return
 
-        self._tmp_dir_created = True
+        self.run.tmp_dir_created = True
 
         path = self.get_tmp_dir()
         pathlib.Path(path).mkdir(parents=True, mode=0o700, exist_ok=True)
@@ -58,7 +153,7 @@ class Stories:
         if line_number is None:
             return None
 
-        return self.tree[line_number]
+        return self.program.tree[line_number]
 
     def first_line(self):
         return self.entrypoint
@@ -73,58 +168,20 @@ class Stories:
         :return: True if this line is a child of the parent (directly or
                  indirectly), False otherwise
         """
+        parent_line = self.program.tree.get(parent_line_number)
+        if parent_line is None:
+            return False
 
-        # Fast test - this line is an immediate child of the parent.
-        if parent_line_number == line.get('parent', None):
-            return True
-
-        while line is not None:
-            my_parent_number = line.get('parent', None)
-
-            if my_parent_number is None:
-                return False
-
-            if my_parent_number == parent_line_number:
-                return True
-
-            line = self.line(my_parent_number)
+        return line.is_descendant_of(parent_line)
 
     def next_block(self, parent_line: dict):
         """
         Given a parent_line, it skips through the block and returns the next
         line after this block.
-        """
-        next_line = parent_line
-
-        while next_line.get('next') is not None:
-            next_line = self.line(next_line['next'])
-
-            # See if the next line is a block. If it is, skip through it.
-            if next_line.get('enter', None) is not None \
-                    and next_line.get('parent') == parent_line['ln']:
-                next_line = self.next_block(next_line)
-
-                if next_line is None:
-                    return None
-
-            if not self.line_has_parent(parent_line['ln'], next_line):
-                break
-
-        # We might have skipped through all the lines in this story,
-        # and ended up on on the last line.
-        # If this last line belongs to the same parent, then return None.
-        # This check is required because the while loop breaks when it can't
-        # find a next line.
-        if next_line.get('parent') is not None \
-                and self.line_has_parent(parent_line['ln'], next_line):
-            return None
-
-        # If the next_line == parent_line, then there weren't any more lines
-        # after the parent.
-        if next_line['ln'] == parent_line['ln']:
-            return None
 
-        return next_line
+        This is resolved when the story is compiled (see StoryProgram).
+        """
+        return parent_line.block_exit
 
     @staticmethod
     def get_str_for_logging(result) -> str:
@@ -140,16 +197,17 @@ class Stories:
         Resolves line argument to their real value
         """
         if isinstance(arg, (str, int, float, bool)):
-            self.logger.info(f'Resolved "{arg}" to '
-                             f'"{arg}" '
-                             f'with type {type(arg)}')
+            self.logger.hot('story-resolve', arg, arg, type(arg))
             return arg
 
-        result = Resolver.resolve(arg, self.context)
+        resolver = self.program.resolvers.get(id(arg))
+        if resolver is None:
+            result = Resolver.resolve(arg, self.context)
+        else:
+            result = resolver(self.context)
 
-        self.logger.info(f'Resolved "{arg}" to '
-                         f'"{self.get_str_for_logging(result)}" '
-                         f'with type {type(result)}')
+        self.logger.hot('story-resolve', arg,
+                        Truncated(result, MAX_BYTES_LOGGING), type(result))
 
         # encode and escape then format for shell
         if encode:
@@ -190,11 +248,9 @@ class Stories:
         return results
 
     def start_line(self, line_number):
-        self.results[line_number] = {'start': time.time()}
+        self.run.results.start(line_number)
 
     def end_line(self, line_number, output=None, assign=None):
-        start = self.results[line_number]['start']
-
         # Please see https://github.com/asyncy/platform-engine/issues/148
         # for the rationale on removing auto conversion. Code commented and
         # NOT removed so that this note here makes sense.
@@ -205,8 +261,7 @@ class Stories:
         #     except JSONDecodeError:
         #         output = output
 
-        dictionary = {'output': output, 'end': time.time(), 'start': start}
-        self.results[line_number] = dictionary
+        self.run.results.end(line_number, output)
 
         # assign a variable to the output
         if assign:
@@ -219,16 +274,41 @@ class Stories:
                 'but no variable found!')
             return
 
-        Dict.set(self.context, assign['paths'], output)
+        setter = self.program.setters.get(id(assign['paths']))
+        if setter is None:
+            Dict.set(self.context, assign['paths'], output)
+        else:
+            setter(self.context, output)
+
+    def writable(self, arg, value):
+        """
+        Returns value, which arg resolved to, so that it may be changed in
+        place. A ReadOnlyDict (shared with other stories) is replaced with
+        a copy of it in the context of this story first.
+        """
+        if not isinstance(value, ReadOnlyDict):
+            return value
+
+        value = dict(value)
+        if isinstance(arg, dict) and arg.get('$OBJECT') == 'path':
+            self.set_variable(arg, value)
+
+        return value
 
     def function_line_by_name(self, function_name):
         """
         Returns the line at which the given function_name was defined at.
         """
-        line_number = self.app.stories[self.name]['functions'][function_name]
-        return self.line(line_number)
+        return self.program.functions[function_name]
 
     def argument_by_name(self, line, argument_name, encode=False):
+        arguments = self.program.arguments.get(id(line))
+        if arguments is not None:
+            if argument_name not in arguments:
+                return None
+
+            return self.resolve(arguments[argument_name], encode=encode)
+
         args = line.get('args', line.get('arguments', line.get('arg')))
         if args is None:
             return None
@@ -270,8 +350,9 @@ class Stories:
         if context is None:
             context = {}
         self.context = context
-        # Optimise this later.
-        self.context['app'] = self.app.app_context.copy()
+        # The app context is shared by all stories, and is only copied
+        # should this story write to it (see Dict#set).
+        self.context['app'] = self.app.app_context
 
     def prepare(self, context=None):
         self.set_context(context)
@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+import copy
+
+from .utils.LRUCache import LRUCache
+from .utils.ResolverCompiler import ResolverCompiler
+
+
+class Line(dict):
+    """
+    A line of a compiled story.
+
+    A Line is still the dict emitted by the Storyscript compiler, so it can
+    be read as usual (line['method'], line.get('next'), etc). Additionally,
+    it carries the Lexicon function which executes it, and direct references
+    to its neighbouring lines, so that walking the tree at runtime doesn't
+    require a lookup for every hop.
+
+    pre and post are the times at which a depth first walk (along 'parent')
+    enters and leaves this line. They make ancestry checks O(1).
+    block_exit is the line after the block of this line (see
+    Stories#next_block).
+    concurrent_calls are the lines which may execute concurrently with
+    (and including) this line, if any (see StoryProgram#group_calls).
+    service_call and container_name are the service call of this line and
+    the container it calls, once they've been worked out (see
+    Services#describe and Services#start_container).
+    """
+    __slots__ = ('handler', 'next_line', 'enter_line', 'exit_line',
+                 'parent_line', 'pre', 'post', 'block_exit',
+                 'concurrent_calls', 'service_call', 'container_name')
+
+    def is_descendant_of(self, line) -> bool:
+        return line.pre < self.pre and self.post < line.post
+
+
+class StoryProgram:
+    """
+    A story tree, compiled once per release (see App).
+    """
+
+    impure_methods = ('execute', 'when')
+    """
+    Lines of these methods make the function they're in impure (they
+    call services, which may have side effects).
+    """
+
+    impure_mutations = ('append', 'prepend', 'reverse', 'sort', 'unique',
+                        'remove', 'replace', 'pop', 'random')
+    """
+    Mutations which change their value in place (which might be an
+    argument of the function), or aren't deterministic.
+    """
+
+    def __init__(self, tree: dict, entrypoint, functions: dict,
+                 resolvers: dict, setters: dict, arguments: dict,
+                 function_cache_size: int = 0):
+        self.tree = tree
+        self.entrypoint = entrypoint
+        self.functions = functions
+        """
+        The lines at which functions are defined, keyed by their name.
+        """
+        self.pure_functions = self.find_pure_functions(tree, functions)
+        """
+        The names of functions whose result only depends on their
+        arguments (see StoryProgram#function_key).
+        """
+        self.function_results = None
+        if function_cache_size > 0 and len(self.pure_functions) > 0:
+            self.function_results = LRUCache(function_cache_size)
+        self.resolvers = resolvers
+        """
+        The compiled arguments of all lines, keyed by the id of the
+        argument (see Stories#resolve).
+        """
+        self.setters = setters
+        """
+        The compiled assignments of all lines, keyed by the id of the
+        path assigned to (see Stories#set_variable).
+        """
+        self.arguments = arguments
+        """
+        The arguments of all lines and mutations by their name, keyed by
+        the id of the line or mutation (see Stories#argument_by_name).
+        """
+
+    @classmethod
+    def compile(cls, story: dict, concurrent_calls: bool = False,
+                function_cache_size: int = 0):
+        """
+        Compiles a story (as found in stories.json) into a program.
+
+        If concurrent_calls is True, consecutive service calls which don't
+        depend on each other are grouped, to be executed concurrently.
+        Up to function_cache_size results of pure functions are cached.
+        """
+        from .processing.Lexicon import Lexicon
+
+        tree = {}
+        for line_number, line in story['tree'].items():
+            tree[line_number] = Line(line)
+
+        for line in tree.values():
+            line.handler = Lexicon.handler(line.get('method'))
+            line.next_line = tree.get(line.get('next'))
+            line.enter_line = tree.get(line.get('enter'))
+            line.exit_line = tree.get(line.get('exit'))
+            line.parent_line = tree.get(line.get('parent'))
+            line.concurrent_calls = None
+            line.service_call = None
+            line.container_name = None
+
+        cls.number_lines(tree)
+        cls.resolve_block_exits(tree)
+        if concurrent_calls:
+            cls.group_calls(tree)
+
+        resolvers = {}
+        setters = {}
+        arguments = {}
+        for line in tree.values():
+            cls.compile_args(line, resolvers, arguments)
+            name = line.get('name')
+            if isinstance(name, list) and len(name) > 0:
+                setters[id(name)] = ResolverCompiler.setter(name)
+
+        functions = {}
+        for name, line_number in story.get('functions', {}).items():
+            functions[name] = tree[line_number]
+
+        return cls(tree, story['entrypoint'], functions, resolvers, setters,
+                   arguments, function_cache_size)
+
+    def function_key(self, function_name, args: dict):
+        """
+        Returns the key which the result of calling function_name with args
+        is cached by, or None if it may not be cached.
+        """
+        if self.function_results is None \
+                or function_name not in self.pure_functions:
+            return None
+
+        try:
+            key = (function_name, self.freeze(args))
+            hash(key)
+        except TypeError:
+            # Some argument can't be hashed.
+            return None
+
+        return key
+
+    @classmethod
+    def freeze(cls, value):
+        """
+        Converts value into something hashable, which compares equal to
+        another frozen value only if the values are equal and of the same
+        types (so 1, 1.0 and True are told apart).
+        """
+        if isinstance(value, dict):
+            return dict, tuple((k, cls.freeze(v)) for k, v in value.items())
+        elif isinstance(value, list):
+            return list, tuple(cls.freeze(v) for v in value)
+
+        return type(value), value
+
+    @staticmethod
+    def copy_result(value):
+        """
+        Copies a cached result, so that changing it in place (when cached,
+        or once it's used) doesn't change the other uses of it.
+        """
+        if isinstance(value, (list, dict)):
+            return copy.deepcopy(value)
+
+        return value
+
+    @classmethod
+    def find_pure_functions(cls, tree: dict, functions: dict) -> set:
+        """
+        Returns the names of functions which neither have lines which
+        may have side effects, nor call functions which do.
+        """
+        pure = set()
+        calls = {}
+        for name, function_line in functions.items():
+            body = [line for line in tree.values()
+                    if line.is_descendant_of(function_line)]
+            if all(cls.is_pure(line) for line in body):
+                pure.add(name)
+                calls[name] = {line.get('function') for line in body
+                               if line.get('method') == 'call'}
+
+        changed = True
+        while changed:
+            changed = False
+            for name in list(pure):
+                if not calls[name].issubset(pure):
+                    pure.discard(name)
+                    changed = True
+
+        return pure
+
+    @classmethod
+    def is_pure(cls, line) -> bool:
+        method = line.get('method')
+        if method in cls.impure_methods:
+            return False
+
+        name = line.get('name')
+        if isinstance(name, list) and len(name) > 1:
+            # Assigns within a value in place, which might be an argument
+            # (and so a value of the caller, see
+            # Stories#context_for_function_call).
+            return False
+
+        return not cls.has_impure_mutation(line)
+
+    @classmethod
+    def has_impure_mutation(cls, item) -> bool:
+        if isinstance(item, list):
+            return any(cls.has_impure_mutation(i) for i in item)
+        elif isinstance(item, dict):
+            if item.get('$OBJECT') == 'mutation' \
+                    and item.get('mutation') in cls.impure_mutations:
+                return True
+
+            return any(cls.has_impure_mutation(v) for v in item.values())
+
+        return False
+
+    @classmethod
+    def compile_args(cls, owner: dict, resolvers: dict, arguments: dict):
+        """
+        Compiles the arguments of a line (or of a mutation) into resolvers,
+        and indexes the named ones by their name.
+        """
+        args = owner.get('args', owner.get('arguments'))
+        if not isinstance(args, list):
+            return
+
+        named = arguments[id(owner)] = {}
+        for arg in args:
+            if not isinstance(arg, dict):
+                continue
+
+            object_type = arg.get('$OBJECT')
+            if object_type == 'argument' or object_type == 'arg':
+                name = arg.get('name')
+                arg = arg.get('argument', arg.get('arg'))
+                named.setdefault(name, arg)
+                if not isinstance(arg, dict):
+                    continue
+            elif object_type == 'mutation':
+                cls.compile_args(arg, resolvers, arguments)
+                continue
+
+            resolvers[id(arg)] = ResolverCompiler.compile(arg)
+
+    @staticmethod
+    def number_lines(tree: dict):
+        """
+        Sets pre and post for all lines, by walking the hierarchy of lines
+        depth first.
+        """
+        children = {}
+        stack = []
+        for line_number, line in tree.items():
+            if line.parent_line is None:
+                stack.append((line_number, line, False))
+            else:
+                children.setdefault(line['parent'], []) \
+                    .append((line_number, line))
+
+        clock = 0
+        while len(stack) > 0:
+            line_number, line, visited = stack.pop()
+            clock += 1
+            if visited:
+                line.post = clock
+                continue
+
+            line.pre = clock
+            stack.append((line_number, line, True))
+            for child_number, child in children.get(line_number, []):
+                stack.append((child_number, child, False))
+
+    @staticmethod
+    def resolve_block_exits(tree: dict):
+        """
+        Sets block_exit for all lines, which is the first line following
+        a line which isn't a part of its block (or None).
+
+        Lines are resolved in the reverse order of them being entered, so
+        nested blocks are resolved before their parent, and can be skipped
+        through entirely.
+        """
+        lines = sorted(tree.values(), key=lambda line: line.pre, reverse=True)
+        for line in lines:
+            next_line = line.next_line
+            while next_line is not None and next_line.is_descendant_of(line):
+                if next_line.parent_line is line \
+                        and next_line.get('enter') is not None:
+                    next_line = next_line.block_exit
+                else:
+                    next_line = next_line.next_line
+
+            line.block_exit = next_line
+
+    @classmethod
+    def group_calls(cls, tree: dict):
+        """
+        Finds runs of consecutive service calls (in the same block) which
+        may execute concurrently, and sets concurrent_calls on the first
+        line of every run.
+
+        A call may join a run if it doesn't read or assign any variable
+        which a call before it in the run assigns, and doesn't assign any
+        variable which they read. The service of a call counts as read,
+        so calls to a service which is assigned in the run are kept in
+        order.
+        """
+        previous = {}
+        for line in tree.values():
+            if line.next_line is not None:
+                previous[id(line.next_line)] = line
+
+        for line in tree.values():
+            if not cls.is_groupable(line):
+                continue
+
+            prev = previous.get(id(line))
+            if prev is not None and cls.is_groupable(prev) \
+                    and prev.parent_line is line.parent_line:
+                # Grouped along with the calls before it.
+                continue
+
+            run = [line]
+            reads, writes = cls.variables(line)
+            line = line.next_line
+            while line is not None and cls.is_groupable(line) \
+                    and line.parent_line is run[0].parent_line:
+                line_reads, line_writes = cls.variables(line)
+                if reads.isdisjoint(line_writes) \
+                        and writes.isdisjoint(line_reads) \
+                        and writes.isdisjoint(line_writes):
+                    run.append(line)
+                    reads |= line_reads
+                    writes |= line_writes
+                else:
+                    cls.set_concurrent_calls(run)
+                    run = [line]
+                    reads, writes = line_reads, line_writes
+
+                line = line.next_line
+
+            cls.set_concurrent_calls(run)
+
+    @staticmethod
+    def set_concurrent_calls(run: list):
+        if len(run) > 1:
+            run[0].concurrent_calls = tuple(run)
+
+    @staticmethod
+    def is_groupable(line) -> bool:
+        """
+        Only service calls which don't start a streaming service, and aren't
+        within a when block (where services may be bound to the event being
+        handled), may be grouped.
+        """
+        if line.get('method') != 'execute' or line.get('enter') is not None:
+            return False
+
+        parent = line.parent_line
+        while parent is not None:
+            if parent.get('method') == 'when':
+                return False
+            parent = parent.parent_line
+
+        return True
+
+    @classmethod
+    def variables(cls, line):
+        """
+        Returns the variables which line reads, and the ones it assigns.
+        """
+        reads = {line.get('service')}
+        cls.find_paths(line.get('args', line.get('arguments')), reads)
+
+        writes = set()
+        for paths in (line.get('name'), line.get('output')):
+            if isinstance(paths, list) and len(paths) > 0 \
+                    and isinstance(paths[0], str):
+                writes.add(paths[0])
+
+        return reads, writes
+
+    @classmethod
+    def find_paths(cls, item, paths: set):
+        """
+        Adds the first part of every path found in item to paths.
+        """
+        if isinstance(item, list):
+            for i in item:
+                cls.find_paths(i, paths)
+        elif isinstance(item, dict):
+            if item.get('$OBJECT') == 'path':
+                path = item.get('paths')
+                if isinstance(path, list) and len(path) > 0 \
+                        and isinstance(path[0], str):
+                    paths.add(path[0])
+
+            for value in item.values():
+                cls.find_paths(value, paths)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import time
+import uuid
+
+
+class StoryRun:
+    """
+    The state of a single run of a story. Everything which doesn't change
+    between runs (the tree, functions, etc) is compiled once per release
+    instead (see StoryProgram).
+
+    A run is needed for every event an app receives, so runs are recycled
+    (see StoryRun#acquire and StoryRun#release).
+    """
+    __slots__ = ('context', 'environment', 'results', 'stack',
+                 'tmp_dir_created', 'profile_frame', 'slice_start',
+                 '_execution_id')
+
+    pool = []
+
+    pool_size = 256
+    """
+    The maximum number of released runs kept for reuse.
+    """
+
+    def __init__(self):
+        self.context = None
+        self.environment = None
+        self.results = None
+        """
+        The LineResults of this run.
+        """
+        self.stack = []
+        self.tmp_dir_created = False
+        self.profile_frame = None
+        """
+        The line being profiled, if any (see Profiler).
+        """
+        self.slice_start = time.time()
+        """
+        When this run last yielded to the event loop (see Story#yield_slice).
+        """
+        self._execution_id = None
+
+    @property
+    def execution_id(self):
+        # Generated on demand, since most runs never need one.
+        if self._execution_id is None:
+            self._execution_id = str(uuid.uuid4())
+
+        return self._execution_id
+
+    @execution_id.setter
+    def execution_id(self, execution_id):
+        self._execution_id = execution_id
+
+    @classmethod
+    def acquire(cls):
+        """
+        Returns a run from the pool, or a new one if the pool is empty.
+        """
+        if len(cls.pool) > 0:
+            run = cls.pool.pop()
+            run.slice_start = time.time()
+            return run
+
+        return cls()
+
+    def release(self):
+        """
+        Resets this run and returns it to the pool. Nothing may refer to
+        this run once it's released.
+        """
+        if len(StoryRun.pool) >= StoryRun.pool_size:
+            return
+
+        self.context = None
+        self.environment = None
+        self.results = None
+        self.stack.clear()
+        self.tmp_dir_created = False
+        self.profile_frame = None
+        self._execution_id = None
+        StoryRun.pool.append(self)
@@ -12,3 +12,5 @@ InternalService = namedtuple('InternalService', ['commands'])
 Service = namedtuple('Service', ['name'])
 Command = namedtuple('Command', ['name'])
 Event = namedtuple('Event', ['name'])
+
+ServiceCall = namedtuple('ServiceCall', ['chain', 'command_conf', 'internal'])
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+import enum
+
+
+@enum.unique
+class ResultRetention(str, enum.Enum):
+    """
+    What's retained about the lines executed by a story (see LineResults).
+    """
+    OFF = 'off'
+    TIMINGS = 'timings'
+    FULL = 'full'
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import ujson
+
+from .BaseHandler import BaseHandler
+from ..Apps import Apps
+
+
+class ProfileHandler(BaseHandler):
+    """
+    Reports the lines which took the most time to execute, for an app
+    which has profiling enabled (see Profiler).
+    """
+
+    def get(self):
+        app_id = self.get_argument('app')
+        limit = int(self.get_argument('limit', '20'))
+
+        app = Apps.apps.get(app_id)
+        if app is None or app.profiler is None:
+            self.set_status(404, 'Not profiling this app')
+            self.finish()
+            return
+
+        self.set_header('Content-Type', 'application/json')
+        self.finish(ujson.dumps({
+            'app_id': app_id,
+            'lines': app.profiler.report(limit)
+        }))
+
+    def delete(self):
+        app = Apps.apps.get(self.get_argument('app'))
+        if app is None or app.profiler is None:
+            self.set_status(404, 'Not profiling this app')
+        else:
+            app.profiler.reset()
+
+        self.finish()
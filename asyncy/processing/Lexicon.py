@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import time
 
 from .Mutations import Mutations
@@ -6,7 +7,9 @@ from .Services import Services
 from .. import Metrics
 from ..Exceptions import InvalidKeywordUsage, StoryscriptError, \
     StoryscriptRuntimeError
+from ..Profiler import Profiler
 from ..Stories import Stories
+from ..StoryProgram import StoryProgram
 from ..Types import StreamingService
 from ..constants.LineConstants import LineConstants
 from ..constants.LineSentinels import LineSentinels, ReturnSentinel
@@ -17,6 +20,38 @@ class Lexicon:
     Lexicon of possible line actions and their implementation
     """
 
+    methods = {
+        'if': 'if_condition',
+        'elif': 'if_condition',
+        'else': 'if_condition',
+        'for': 'for_loop',
+        'execute': 'execute',
+        'set': 'set',
+        'expression': 'set',
+        'mutation': 'set',
+        'call': 'call',
+        'function': 'function',
+        'when': 'when',
+        'return': 'ret',
+        'break': 'break_'
+    }
+    """
+    The dispatch table of line methods to the Lexicon functions which
+    implement them.
+    """
+
+    @classmethod
+    def handler(cls, method):
+        """
+        Returns the function which executes lines of the given method,
+        or None if the method is unknown.
+        """
+        name = cls.methods.get(method)
+        if name is None:
+            return None
+
+        return getattr(cls, name)
+
     @staticmethod
     async def execute(logger, story, line):
         """
@@ -38,21 +73,29 @@ class Lexicon:
                     # do something with result
             """
             output = await Services.start_container(story, line)
+            service_time = time.time() - start
             Metrics.container_start_seconds_total.labels(
                 app_id=story.app.app_id,
                 story_name=story.name, service=service
-            ).observe(time.time() - start)
+            ).observe(service_time)
+            Profiler.service_time(story, service_time)
+            # Waiting for the service let other stories run.
+            story.run.slice_start = time.time()
 
             story.end_line(line['ln'], output=output,
                            assign={'paths': line.get('output')})
 
-            return Lexicon.line_number_or_none(story.line(line.get('next')))
+            return line.get('next')
         else:
             output = await Services.execute(story, line)
+            service_time = time.time() - start
             Metrics.container_exec_seconds_total.labels(
                 app_id=story.app.app_id,
                 story_name=story.name, service=service
-            ).observe(time.time() - start)
+            ).observe(service_time)
+            Profiler.service_time(story, service_time)
+            # Waiting for the service let other stories run.
+            story.run.slice_start = time.time()
 
             if line.get('name') and len(line['name']) == 1:
                 story.end_line(line['ln'], output=output,
@@ -61,7 +104,7 @@ class Lexicon:
                 story.end_line(line['ln'], output=output,
                                assign=line.get('output'))
 
-            return Lexicon.line_number_or_none(story.line(line.get('next')))
+            return line.get('next')
 
     @staticmethod
     async def function(logger, story, line):
@@ -80,10 +123,22 @@ class Lexicon:
         function block to be executed, and will return the output (if any).
         """
         current_context = story.context
-        function_line = story.function_line_by_name(line.get('function'))
+        function_name = line.get('function')
+        function_line = story.function_line_by_name(function_name)
         context = story.context_for_function_call(line, function_line)
+        program = story.program
+        key = program.function_key(function_name, context)
         return_from_function_call = None
         try:
+            if key is not None and key in program.function_results:
+                Metrics.function_cache_hits.labels(
+                    app_id=story.app.app_id, story_name=story.name,
+                    function=function_name
+                ).inc()
+                return_from_function_call = program.copy_result(
+                    program.function_results.get(key))
+                return line.get('next')
+
             story.set_context(context)
             from . import Story
             result = await Story.execute_block(logger, story, function_line)
@@ -96,7 +151,15 @@ class Lexicon:
 
                 return_from_function_call = result.return_value
 
-            return Lexicon.line_number_or_none(story.line(line.get('next')))
+            if key is not None:
+                Metrics.function_cache_misses.labels(
+                    app_id=story.app.app_id, story_name=story.name,
+                    function=function_name
+                ).inc()
+                program.function_results.put(
+                    key, program.copy_result(return_from_function_call))
+
+            return line.get('next')
         finally:
             story.set_context(current_context)
             if line.get('name') is not None and len(line['name']) > 0:
@@ -143,9 +206,14 @@ class Lexicon:
 
         if len(line['args']) > 1:
             # Check if args[1] is a mutation.
-            if line['args'][1]['$OBJECT'] == 'mutation':
-                value = Mutations.mutate(line['args'][1], value, story, line)
-                logger.debug(f'Mutation result: {value}')
+            mutation = line['args'][1]
+            if mutation['$OBJECT'] == 'mutation':
+                if mutation.get('mutation') in StoryProgram.impure_mutations:
+                    # It might change the value in place.
+                    value = story.writable(line['args'][0], value)
+
+                value = Mutations.mutate(mutation, value, story, line)
+                logger.hot('lexicon-mutation', value)
             else:
                 raise StoryscriptError(
                     message=f'Unsupported argument in set: '
@@ -154,7 +222,7 @@ class Lexicon:
 
         story.end_line(line['ln'], output=value,
                        assign={'$OBJECT': 'path', 'paths': line['name']})
-        return Lexicon.line_number_or_none(story.line(line.get('next')))
+        return line.get('next')
 
     @staticmethod
     def _is_if_condition_true(story, line):
@@ -188,7 +256,7 @@ class Lexicon:
 
         # while true here because all if/elif/elif/else is executed here.
         while True:
-            logger.log('lexicon-if', line, story.context)
+            logger.hot('lexicon-if', line, story.context)
 
             if line['method'] == 'else':
                 result = True
@@ -220,7 +288,7 @@ class Lexicon:
 
     @staticmethod
     def unless_condition(logger, story, line):
-        logger.log('lexicon-unless', line, story.context)
+        logger.hot('lexicon-unless', line, story.context)
         result = story.resolve(line['args'][0], encode=False)
         if result:
             return line['exit']
@@ -234,6 +302,12 @@ class Lexicon:
         _list = story.resolve(line['args'][0], encode=False)
         output = line['output'][0]
 
+        concurrency = story.app.app_config.get_loop_concurrency(
+            story.name, line['ln'])
+        if concurrency > 1:
+            return await Lexicon.for_loop_parallel(
+                logger, story, line, _list, output, concurrency)
+
         from . import Story
 
         try:
@@ -255,6 +329,64 @@ class Lexicon:
         # Use story.next_block(line), because line["exit"] is unreliable...
         return Lexicon.line_number_or_none(story.next_block(line))
 
+    @staticmethod
+    async def for_loop_parallel(logger, story, line, _list, output,
+                                concurrency: int):
+        """
+        Evaluates a for loop, running up to concurrency iterations at once.
+
+        Every iteration runs in a fork of the story, with a copy of the
+        context. Once all iterations are done, the variables which each
+        iteration assigned are copied back to the context in the order of
+        the items, so the last iteration to assign a variable wins, just like
+        it would when iterating sequentially.
+
+        Iterations following one which breaks (or returns) are discarded,
+        although they might have been executed already.
+        """
+        from . import Story
+
+        items = list(_list)
+        forks = [None] * len(items)
+        bases = [None] * len(items)
+        results = [None] * len(items)
+        indexes = iter(range(len(items)))
+        stop = len(items)
+
+        async def iterate():
+            nonlocal stop
+            for i in indexes:
+                if i > stop:
+                    return
+
+                bases[i] = dict(story.context)
+                context = dict(bases[i])
+                context[output] = items[i]
+                forks[i] = story.fork(context)
+                results[i] = await Story.execute_block(logger, forks[i], line)
+                if LineSentinels.is_sentinel(results[i]):
+                    stop = min(stop, i)
+
+        workers = [asyncio.ensure_future(iterate())
+                   for _ in range(min(concurrency, len(items)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+        for i in range(min(stop + 1, len(items))):
+            story.join(forks[i], base=bases[i], exclude=output)
+
+        # Don't leak the variable to the outer scope.
+        story.context.pop(output, None)
+
+        if stop < len(items) and results[stop] != LineSentinels.BREAK:
+            # We do not know what to do with this sentinel, so bubble it up.
+            return results[stop]
+
+        return Lexicon.line_number_or_none(story.next_block(line))
+
     @staticmethod
     async def when(logger, story, line):
         service = line[LineConstants.service]
@@ -8,21 +8,56 @@ from ..Exceptions import StoryscriptError
 
 class Mutations:
 
+    types = (
+        (str, StringMutations),
+        (list, ListMutations),
+        (dict, DictMutations),
+        (int, NumberMutations),
+        (float, NumberMutations)
+    )
+    """
+    The mutations of every type, in the order they're matched in.
+    """
+
+    handlers = {}
+    """
+    The handlers of mutations, keyed by the type of the value mutated and
+    the mutation (see Mutations#handler).
+    """
+
+    @classmethod
+    def handler(cls, value, operator):
+        """
+        Returns the function which applies operator to value, or None if
+        there's none.
+
+        Handlers are looked up by the exact type of value, and resolved
+        the first time a type is mutated (subtypes, such as bool, resolve
+        to the mutations of the type they derive from).
+        """
+        key = (type(value), operator)
+        try:
+            return cls.handlers[key]
+        except KeyError:
+            pass
+
+        handler = None
+        for type_, mutations in cls.types:
+            if isinstance(value, type_):
+                handler = getattr(mutations, operator, None)
+                break
+
+        if handler is not None:
+            # Unknown mutations aren't cached, since operators come from
+            # stories, and the table would otherwise grow unbounded.
+            cls.handlers[key] = handler
+
+        return handler
+
     @classmethod
     def mutate(cls, mutation, value, story, line):
         operator = mutation['mutation']
-        handler = None
-        try:
-            if isinstance(value, str):
-                handler = getattr(StringMutations, operator)
-            elif isinstance(value, list):
-                handler = getattr(ListMutations, operator)
-            elif isinstance(value, dict):
-                handler = getattr(DictMutations, operator)
-            elif isinstance(value, int) or isinstance(value, float):
-                handler = getattr(NumberMutations, operator)
-        except AttributeError:
-            pass  # handler is None at this point.
+        handler = cls.handler(value, operator)
 
         if handler is None:
             raise StoryscriptError(
@@ -11,17 +11,22 @@ from tornado.httpclient import AsyncHTTPClient
 
 import ujson
 
+from .. import Metrics
 from ..Containers import Containers
-from ..Exceptions import ArgumentTypeMismatchError, StoryscriptError
+from ..Exceptions import ArgumentTypeMismatchError, \
+    ServiceSaturatedError, StoryscriptError
+from ..Kubernetes import Kubernetes
 from ..Logger import Logger
+from ..StoryProgram import Line
 from ..Types import Command, Event, InternalCommand, \
-    InternalService, Service, StreamingService
+    InternalService, Service, ServiceCall, StreamingService
 from ..constants.ContextConstants import ContextConstants
 from ..constants.LineConstants import LineConstants
 from ..constants.ServiceConstants import ServiceConstants
 from ..entities.Multipart import FileFormField, FormField
 from ..omg.ServiceOutputValidator import ServiceOutputValidator
 from ..utils import Dict
+from ..utils.Constant import Constant
 from ..utils.HttpUtils import HttpUtils
 from ..utils.StringUtils import StringUtils
 
@@ -58,12 +63,35 @@ class Services:
         return chain[len(chain) - 1]
 
     @classmethod
-    async def execute(cls, story, line):
+    def describe(cls, story, line) -> ServiceCall:
+        """
+        Returns the chain, the command conf, and whether the service called
+        by line is internal (in which case there's no command conf).
+
+        These only depend on the release, the story, and the line, so
+        they're worked out once per line of a program (see Line).
+        """
+        if isinstance(line, Line) and line.service_call is not None:
+            return line.service_call
+
         chain = cls.resolve_chain(story, line)
         assert isinstance(chain, deque)
         assert isinstance(chain[0], Service)
 
-        if cls.is_internal(chain[0].name, cls.last(chain).name):
+        command_conf = None
+        internal = cls.is_internal(chain[0].name, cls.last(chain).name)
+        if not internal:
+            command_conf = cls.get_command_conf(story, chain)
+
+        service_call = ServiceCall(chain, command_conf, internal)
+        if isinstance(line, Line):
+            line.service_call = service_call
+
+        return service_call
+
+    @classmethod
+    async def execute(cls, story, line):
+        if cls.describe(story, line).internal:
             return await cls.execute_internal(story, line)
         else:
             return await cls.execute_external(story, line)
@@ -95,19 +123,61 @@ class Services:
         is application/json, this method will parse the response
         and return a dict.
         """
-        service = line[LineConstants.service]
-        chain = cls.resolve_chain(story, line)
-        command_conf = cls.get_command_conf(story, chain)
+        chain, command_conf, _ = cls.describe(story, line)
         await cls.start_container(story, line)
+        return await cls.call_external(story, line, chain, command_conf)
+
+    @classmethod
+    async def in_bulkhead(cls, story, service, call):
+        """
+        Returns the result of call(), once a call to service is allowed in
+        flight (see App#get_bulkhead).
+        """
+        bulkhead = story.app.get_bulkhead(service)
+        if bulkhead is None:
+            return await call()
+
+        await cls.acquire_bulkhead(story, service, bulkhead)
+        try:
+            return await call()
+        finally:
+            bulkhead.release()
+
+    @classmethod
+    async def acquire_bulkhead(cls, story, service, bulkhead):
+        """
+        Waits for a call to service to be allowed in flight, or rejects it
+        right away should too many be in flight and waiting already.
+        """
+        if bulkhead.full():
+            Metrics.service_calls_rejected.labels(
+                app_id=story.app.app_id, service=service).inc()
+            raise ServiceSaturatedError(service)
+
+        waiting = Metrics.service_calls_waiting.labels(
+            app_id=story.app.app_id, service=service)
+        waiting.inc()
+        try:
+            await bulkhead.acquire()
+        finally:
+            waiting.dec()
+
+    @classmethod
+    async def call_external(cls, story, line, chain, command_conf):
+        """
+        Calls the service, within its bulkhead. HTTP calls only take a
+        slot of it to fetch (see Services#fetch), since their responses
+        might be cached or shared.
+        """
+        service = line[LineConstants.service]
         if command_conf.get('format') is not None:
-            return await Containers.exec(story.logger, story, line,
-                                         service, line['command'])
+            return await cls.in_bulkhead(story, chain[0].name, partial(
+                Containers.exec, story.logger, story, line,
+                service, line['command']))
         elif command_conf.get('http') is not None:
             if command_conf['http'].get('use_event_conn', False):
-                return await cls.execute_inline(
-                    story, line,
-                    chain, command_conf
-                )
+                return await cls.in_bulkhead(story, chain[0].name, partial(
+                    cls.execute_inline, story, line, chain, command_conf))
             else:
                 return await cls.execute_http(
                     story, line, chain, command_conf
@@ -359,7 +429,7 @@ class Services:
     async def execute_http(cls, story, line, chain, command_conf):
         assert isinstance(chain, deque)
         assert isinstance(chain[0], Service)
-        hostname = await Containers.get_hostname(story, line, chain[0].name)
+        hostname = await cls.get_hostname(story, line, chain[0].name)
         args = command_conf.get('arguments', {})
         body = {}
         query_params = {}
@@ -424,13 +494,43 @@ class Services:
             command_conf['http']['path'].format(**path_params), query_params)
         url = f'http://{hostname}:{port}{path}'
 
-        story.logger.debug(f'Invoking service on {url} with payload {kwargs}')
+        story.logger.hot('service-invoke', url, kwargs)
+
+        key = None
+        ttl = None
+        if cls.is_idempotent(command_conf) and 'body_producer' not in kwargs:
+            # Actions on the same path might parse (and validate) their
+            # responses differently, hence the command.
+            key = (cls.last(chain).name, url,
+                   kwargs['method'], kwargs.get('body'))
+            ttl = story.app.get_cache_ttl(chain[0].name, cls.last(chain).name,
+                                          command_conf)
+
+        if ttl is not None:
+            labels = {'app_id': story.app.app_id, 'service': chain[0].name}
+            output = story.app.responses.get(key)
+            if output is not None:
+                Metrics.response_cache_hits.labels(**labels).inc()
+                return Constant.thaw(output)
+
+            Metrics.response_cache_misses.labels(**labels).inc()
 
         client = AsyncHTTPClient()
-        response = await HttpUtils.fetch_with_retry(
-            3, story.logger, url, client, kwargs
-        )
+        response = await cls.fetch(story, chain[0].name, url, client, kwargs,
+                                   key)
+        output = cls.parse_response(story, line, chain, command_conf,
+                                    response)
+        if ttl is None:
+            return output
+
+        # Validated (while parsing) only when cached, not on every hit.
+        story.app.responses.put(key, output, len(response.body or b''), ttl)
+        Metrics.response_cache_bytes.labels(app_id=story.app.app_id) \
+            .set(story.app.responses.size)
+        return Constant.thaw(output)
 
+    @classmethod
+    def parse_response(cls, story, line, chain, command_conf, response):
         story.logger.debug(f'HTTP response code is {response.code}')
         if int(response.code / 100) == 2:
             content_type = response.headers.get('Content-Type')
@@ -459,6 +559,34 @@ class Services:
                 story=story, line=line
             )
 
+    @classmethod
+    async def fetch(cls, story, service, url, client, kwargs, key=None):
+        """
+        Fetches url, within the bulkhead of service. If the app coalesces
+        calls, requests by the same key (to an idempotent action) which
+        are in flight at once share a response, and only the first of
+        them takes a slot of the bulkhead (every caller parses the
+        response on its own).
+        """
+        fetch = partial(cls.in_bulkhead, story, service, partial(
+            HttpUtils.fetch_with_retry, 3, story.logger, url, client, kwargs))
+        single_flight = story.app.single_flight
+        if single_flight is None or key is None:
+            return await fetch()
+
+        return await single_flight.do(key, fetch)
+
+    @staticmethod
+    def is_idempotent(command_conf: dict) -> bool:
+        """
+        Actions are idempotent if their method is GET, or if they're marked
+        as such (idempotent: true).
+        """
+        if command_conf.get('idempotent') is True:
+            return True
+
+        return command_conf['http'].get('method', 'post').lower() == 'get'
+
     @classmethod
     def parse_output(cls, command_conf: dict, raw_output, story,
                      line, content_type: str):
@@ -495,16 +623,43 @@ class Services:
 
     @classmethod
     async def start_container(cls, story, line):
-        chain = cls.resolve_chain(story, line)
-        assert isinstance(chain[0], Service)
-        if chain[0].name == 'http':
+        service_call = cls.describe(story, line)
+        if service_call.chain[0].name == 'http':
             return StreamingService(
                 name='http',
                 command=line[LineConstants.command],
                 container_name='gateway',
                 hostname=story.app.config.ASYNCY_HTTP_GW_HOST)
 
-        return await Containers.start(story, line)
+        if not isinstance(line, Line):
+            return await Containers.start(story, line)
+
+        return await Containers.start(story, line,
+                                      cls.get_container_name(story, line))
+
+    @classmethod
+    def get_container_name(cls, story, line: Line):
+        """
+        Returns the name of the container of the service of line, which is
+        worked out once per line of a program.
+        """
+        if line.container_name is None:
+            line.container_name = Containers.get_container_name(
+                story.app, story.name, line, line[LineConstants.service])
+
+        return line.container_name
+
+    @classmethod
+    async def get_hostname(cls, story, line, service):
+        """
+        Returns the hostname of the container of service for line.
+        """
+        if not isinstance(line, Line) \
+                or line[LineConstants.service] != service:
+            return await Containers.get_hostname(story, line, service)
+
+        return Kubernetes.get_hostname(story.app,
+                                       cls.get_container_name(story, line))
 
     @classmethod
     def init(cls, logger):
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import time
 
 from .. import Metrics
+from ..Exceptions import StoryTimeoutError
 from ..Exceptions import StoryscriptError
 from ..Exceptions import StoryscriptRuntimeError
 from ..Stories import Stories
@@ -12,6 +14,12 @@ from ..processing import Lexicon
 
 class Story:
 
+    slice_seconds = 0.05
+    """
+    How long a story may execute for without yielding to the event loop
+    (so that other stories can run), see Story#yield_slice.
+    """
+
     @staticmethod
     def story(app, logger, story_name):
         return Stories(app, story_name, logger)
@@ -39,12 +47,40 @@ class Story:
                     story=story, line=story.line(line_number))
 
             line_number = result
-            logger.log('story-execution', line_number)
+            logger.hot('story-execution', line_number)
+            await Story.yield_slice(story)
+
+    @classmethod
+    async def yield_slice(cls, story):
+        """
+        Yields to the event loop if the story has been executing for
+        longer than slice_seconds since it last did.
+
+        Stories only yield on their own while waiting for services, so a
+        loop of lines which don't call any would otherwise hold up every
+        other story in the engine.
+        """
+        now = time.time()
+        elapsed = now - story.run.slice_start
+        if elapsed < cls.slice_seconds:
+            return
+
+        app_id = story.app.app_id
+        Metrics.story_slice_seconds.labels(app_id=app_id).observe(elapsed)
+        if elapsed > story.app.longest_slice:
+            story.app.longest_slice = elapsed
+            Metrics.story_longest_slice_seconds.labels(app_id=app_id) \
+                .set(elapsed)
+
+        await asyncio.sleep(0)
+        story.run.slice_start = time.time()
 
     @staticmethod
-    async def execute_line(logger, story, line_number):
+    async def execute_line(logger, story, line_number, concurrent=True):
         """
         Executes a single line by calling the Lexicon for various operations.
+        Should the line be the first of a group of calls which may run
+        concurrently (and concurrent is True), the whole group is executed.
 
         To execute a function completely, see Story#call.
 
@@ -52,34 +88,30 @@ class Story:
         (return value from Lexicon), or None if there is none.
         """
         line: dict = story.line(line_number)
+        if concurrent:
+            calls = getattr(line, 'concurrent_calls', None)
+            if calls is not None:
+                return await Story.execute_concurrently(logger, story, calls)
+
         story.start_line(line_number)
+        profiler = story.app.profiler
+        frame = None
+        if profiler is not None:
+            frame = profiler.enter(story, line_number)
 
         with story.new_frame(line_number):
             try:
-                method = line['method']
-                if method == 'if' or method == 'else' or method == 'elif':
-                    return await Lexicon.if_condition(logger, story, line)
-                elif method == 'for':
-                    return await Lexicon.for_loop(logger, story, line)
-                elif method == 'execute':
-                    return await Lexicon.execute(logger, story, line)
-                elif method == 'set' or method == 'expression' \
-                        or method == 'mutation':
-                    return await Lexicon.set(logger, story, line)
-                elif method == 'call':
-                    return await Lexicon.call(logger, story, line)
-                elif method == 'function':
-                    return await Lexicon.function(logger, story, line)
-                elif method == 'when':
-                    return await Lexicon.when(logger, story, line)
-                elif method == 'return':
-                    return await Lexicon.ret(logger, story, line)
-                elif method == 'break':
-                    return await Lexicon.break_(logger, story, line)
-                else:
+                handler = getattr(line, 'handler', None)
+                if handler is None:
+                    # Not a compiled line.
+                    handler = Lexicon.handler(line['method'])
+
+                if handler is None:
                     raise NotImplementedError(
-                        f'Unknown method to execute: {method}'
+                        f'Unknown method to execute: {line["method"]}'
                     )
+
+                return await handler(logger, story, line)
             except BaseException as e:
                 # Don't wrap StoryscriptError.
                 if isinstance(e, StoryscriptError):
@@ -90,6 +122,35 @@ class Story:
                 raise StoryscriptRuntimeError(
                     message='Failed to execute line',
                     story=story, line=line, root=e)
+            finally:
+                if frame is not None:
+                    profiler.exit(story, frame)
+
+    @staticmethod
+    async def execute_concurrently(logger, story, lines):
+        """
+        Executes lines (which don't depend on each other, see
+        StoryProgram#group_calls) concurrently, and returns the result of
+        the last one.
+
+        Every line executes in a fork of the story, sharing its context.
+        """
+        forks = [story.fork(story.context) for _ in lines]
+        tasks = [
+            asyncio.ensure_future(Story.execute_line(
+                logger, fork, line['ln'], concurrent=False))
+            for fork, line in zip(forks, lines)
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        for fork in forks:
+            story.join(fork)
+
+        return results[-1]
 
     @staticmethod
     async def execute_block(logger, story, parent_line: dict):
@@ -118,6 +179,7 @@ class Story:
         while next_line is not None \
                 and story.line_has_parent(parent_line['ln'], next_line):
             result = await Story.execute_line(logger, story, next_line['ln'])
+            await Story.yield_slice(story)
 
             if result == LineSentinels.RETURN:
                 return None  # Block has completed execution.
@@ -133,22 +195,31 @@ class Story:
                   app, logger, story_name, *, story_id=None,
                   block=None, context=None,
                   function_name=None):
+        """
+        Runs a story as a task, which is tracked by the app (so that it's
+        cancelled along with it, see App#cancel_runs) and cancelled should
+        it run for longer than its budget (see App#get_story_timeout).
+        """
         start = time.time()
         try:
-            logger.log('story-start', story_name, story_id)
-
-            story = cls.story(app, logger, story_name)
-            story.prepare(context)
+            timeout = app.get_story_timeout(story_name)
+            task = asyncio.ensure_future(cls.run_story(
+                app, logger, story_name, story_id=story_id, block=block,
+                context=context, function_name=function_name))
+            app.runs.add(task)
+            try:
+                await asyncio.wait_for(task, timeout)
+            except asyncio.TimeoutError:
+                # Before Python 3.7, wait_for doesn't wait for the task to
+                # be cancelled, so it might still be pending here.
+                if task.done() and not task.cancelled():
+                    # Raised by the story itself, not due to its budget.
+                    raise
 
-            if function_name:
-                raise StoryscriptRuntimeError('No longer supported')
-            elif block:
-                with story.new_frame(block):
-                    await cls.execute_block(logger, story, story.line(block))
-            else:
-                await cls.execute(logger, story)
+                raise StoryTimeoutError(story_name, timeout)
+            finally:
+                app.runs.discard(task)
 
-            logger.log('story-end', story_name, story_id)
             Metrics.story_run_success.labels(app_id=app.app_id,
                                              story_name=story_name) \
                 .observe(time.time() - start)
@@ -161,3 +232,25 @@ class Story:
             Metrics.story_run_total.labels(app_id=app.app_id,
                                            story_name=story_name) \
                 .observe(time.time() - start)
+
+    @classmethod
+    async def run_story(cls,
+                        app, logger, story_name, *, story_id=None,
+                        block=None, context=None,
+                        function_name=None):
+        logger.log('story-start', story_name, story_id)
+
+        story = cls.story(app, logger, story_name)
+        story.prepare(context)
+
+        if function_name:
+            raise StoryscriptRuntimeError('No longer supported')
+        elif block:
+            with story.new_frame(block):
+                await cls.execute_block(logger, story, story.line(block))
+        else:
+            await cls.execute(logger, story)
+
+        logger.log('story-end', story_name, story_id)
+        # Not released on failure, since the error refers to the story.
+        story.release()
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import bisect
+import math
 import random
 
 
@@ -50,6 +52,67 @@ class ListMutations:
     def sum(cls, mutation, value, story, line, operator):
         return sum(value)
 
+    @classmethod
+    def mean(cls, mutation, value, story, line, operator):
+        """
+        The mean of the values, or None if there are none.
+        """
+        if len(value) == 0:
+            return None
+
+        return math.fsum(value) / len(value)
+
+    @classmethod
+    def percentile(cls, mutation, value, story, line, operator):
+        """
+        The value below which the given percent (0 to 100) of the values
+        fall, interpolating linearly between the closest two, or None if
+        there are no values.
+        """
+        percent = story.argument_by_name(mutation, 'percent')
+        assert 0 <= percent <= 100
+        if len(value) == 0:
+            return None
+
+        values = sorted(value)
+        position = (len(values) - 1) * percent / 100
+        lower = math.floor(position)
+        fraction = position - lower
+        if fraction == 0:
+            return values[lower]
+
+        return values[lower] + (values[lower + 1] - values[lower]) * fraction
+
+    @classmethod
+    def histogram(cls, mutation, value, story, line, operator):
+        """
+        Counts the values in each of the given number of bins, which split
+        the range from the smallest value to the largest one equally (the
+        last bin includes the largest value). Should all the values be
+        equal (so that the range is empty), they're all in the first bin.
+        """
+        bins = story.argument_by_name(mutation, 'bins')
+        assert isinstance(bins, int) and bins > 0
+        counts = [0] * bins
+        if len(value) == 0:
+            return counts
+
+        values = sorted(value)
+        low = values[0]
+        width = (values[-1] - low) / bins
+        if width == 0:
+            counts[0] = len(values)
+            return counts
+
+        start = 0
+        for i in range(1, bins):
+            end = bisect.bisect_left(values, low + width * i, start)
+            counts[i - 1] = end - start
+            start = end
+
+        counts[-1] = len(values) - start
+        return counts
+
     @classmethod
     def contains(cls, mutation, value, story, line, operator):
         item = story.argument_by_name(mutation, 'item')
@@ -57,14 +120,9 @@ class ListMutations:
 
     @classmethod
     def unique(cls, mutation, value, story, line, operator):
-        tmp_set = set()
-        i = 0
-        while i < len(value):
-            if value[i] in tmp_set:
-                del value[i]
-            else:
-                tmp_set.add(value[i])
-                i += 1
+        # Keeps the first of equal items, in order. Replaced all at once,
+        # since deleting items one by one shifts the rest every time.
+        value[:] = dict.fromkeys(value)
 
     @classmethod
     def remove(cls, mutation, value, story, line, operator):
@@ -79,6 +137,4 @@ class ListMutations:
     def replace(cls, mutation, value, story, line, operator):
         by = story.argument_by_name(mutation, 'by')
         item = story.argument_by_name(mutation, 'item')
-        for i, el in enumerate(value):
-            if el == item:
-                value[i] = by
+        value[:] = [by if el == item else el for el in value]
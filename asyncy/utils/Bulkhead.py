@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from collections import deque
+
+
+class Bulkhead:
+    """
+    Limits the number of calls in flight at once, and the number of calls
+    waiting for one of them to complete. Calls beyond both should be
+    rejected (see Bulkhead#full), rather than queue up behind a callee
+    which isn't keeping up.
+    """
+    __slots__ = ('concurrency', 'queue_size', 'in_flight', 'waiters')
+
+    def __init__(self, concurrency: int, queue_size: int):
+        assert concurrency > 0
+        assert queue_size >= 0
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self.waiters = deque()
+
+    def full(self) -> bool:
+        return self.in_flight >= self.concurrency \
+            and len(self.waiters) >= self.queue_size
+
+    async def acquire(self):
+        """
+        Waits for a call to be allowed in flight. Must be released
+        (see Bulkhead#release) once the call is complete.
+        """
+        if self.in_flight < self.concurrency and len(self.waiters) == 0:
+            self.in_flight += 1
+            return
+
+        assert not self.full()
+        waiter = asyncio.get_event_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                # Never handed a slot (see Bulkhead#release).
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+            else:
+                # It was handed over just before the cancellation.
+                self.release()
+            raise
+
+    def release(self):
+        """
+        Hands the slot of a complete call over to the first call waiting
+        (which therefore doesn't change in_flight), if there's one.
+        """
+        while len(self.waiters) > 0:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self.in_flight -= 1
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+
+class Constant:
+    """
+    A compiled object (see ResolverCompiler) whose value doesn't depend on
+    the context, so it's resolved once, when the story is compiled.
+
+    Lists and dicts are frozen as they are, and copied for every
+    evaluation, since stories may change them in place.
+    """
+    __slots__ = ('value', 'mutable')
+
+    def __init__(self, value):
+        self.value = value
+        self.mutable = isinstance(value, (list, dict))
+
+    def __call__(self, data):
+        if self.mutable:
+            return self.thaw(self.value)
+
+        return self.value
+
+    @classmethod
+    def thaw(cls, value):
+        """
+        Copies the lists and dicts within value, leaving everything else
+        (which is immutable) as is.
+        """
+        if isinstance(value, list):
+            return [cls.thaw(i) for i in value]
+        elif isinstance(value, dict):
+            return {k: cls.thaw(v) for k, v in value.items()}
+
+        return value
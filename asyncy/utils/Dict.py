@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from .ReadOnlyDict import ReadOnlyDict
 from .Resolver import Resolver
 
 
@@ -10,18 +11,32 @@ class Dict:
             _dict[keys[0]] = output
         else:
             _cur = _dict
-            last = keys.pop()
-            for key in keys:
-                if isinstance(_cur, list):
-                    _cur = _cur[Dict.parse_int(key)]
-                else:
-                    _cur = _cur.setdefault(key, {})
+            last = keys[-1]
+            for key in keys[:-1]:
+                _cur = Dict.writable_child(_cur, key)
 
             if isinstance(_cur, list):
                 _cur[Dict.parse_int(last)] = output
             else:
                 _cur[Dict.parse_map_key(last, _dict)] = output
 
+    @staticmethod
+    def writable_child(_cur, key):
+        """
+        Returns the child of _cur at key, creating it if needed. A
+        ReadOnlyDict is replaced with a copy of it first.
+        """
+        if isinstance(_cur, list):
+            key = Dict.parse_int(key)
+            child = _cur[key]
+        else:
+            child = _cur.setdefault(key, {})
+
+        if isinstance(child, ReadOnlyDict):
+            child = _cur[key] = child.copy()
+
+        return child
+
     @staticmethod
     def parse_int(s):
         if isinstance(s, str):
@@ -1,12 +1,74 @@
 # -*- coding: utf-8 -*-
 import asyncio
-from urllib.parse import urlencode
+import time
+from urllib.parse import urlencode, urlsplit
 
-from tornado.httpclient import HTTPError
+from tornado.httpclient import AsyncHTTPClient, HTTPError
+
+from .. import Metrics
 
 
 class HttpUtils:
 
+    max_host_connections = 0
+    """
+    The number of requests which may be in flight to a single host at
+    once, or 0 for no limit (see HttpUtils#fetch).
+    """
+
+    host_slots = {}
+    """
+    The connections available to every host which is being fetched from,
+    along with the number of requests using (or waiting for) them.
+    """
+
+    @classmethod
+    def configure(cls, logger, max_clients: int, max_host_connections: int):
+        """
+        Configures the HTTP client shared by the engine (AsyncHTTPClient
+        is a singleton per event loop).
+
+        curl is used if pycurl is installed (pip install
+        asyncy-platform-engine[curl]), since it keeps connections (to
+        services) alive, which tornado's own client doesn't.
+        """
+        impl = None
+        try:
+            import pycurl  # noqa: F401
+            impl = 'tornado.curl_httpclient.CurlAsyncHTTPClient'
+        except ImportError:
+            logger.warn('pycurl is not installed, so connections to '
+                        'services will not be kept alive')
+
+        AsyncHTTPClient.configure(impl, max_clients=max_clients)
+        cls.max_host_connections = max_host_connections
+        cls.host_slots = {}
+
+    @classmethod
+    async def fetch(cls, url, http_client, kwargs):
+        """
+        Fetches url, once one of the connections to its host is available.
+        """
+        if cls.max_host_connections <= 0:
+            return await http_client.fetch(url, **kwargs)
+
+        host = urlsplit(url).netloc
+        slot = cls.host_slots.get(host)
+        if slot is None:
+            slot = cls.host_slots[host] = \
+                [asyncio.Semaphore(cls.max_host_connections), 0]
+
+        slot[1] += 1
+        start = time.time()
+        try:
+            async with slot[0]:
+                Metrics.http_queue_seconds.observe(time.time() - start)
+                return await http_client.fetch(url, **kwargs)
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                del cls.host_slots[host]
+
     @staticmethod
     def read_response_body_quietly(response):
         try:
@@ -22,7 +84,7 @@ class HttpUtils:
         while attempts < tries:
             attempts = attempts + 1
             try:
-                res = await http_client.fetch(url, **kwargs)
+                res = await HttpUtils.fetch(url, http_client, kwargs)
                 if res.code == 599:  # Network connectivity issues.
                     raise HTTPError(res.code, message=str(res.error),
                                     response=res)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    A cache which holds up to maxsize items, evicting the least recently
+    used item first.
+    """
+
+    def __init__(self, maxsize: int):
+        assert maxsize > 0
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        try:
+            self._items.move_to_end(key)
+        except KeyError:
+            return default
+
+        return self._items[key]
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
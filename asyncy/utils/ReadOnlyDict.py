@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+
+class ReadOnlyDict(dict):
+    """
+    A dict which is shared between stories (such as the app context), and
+    hence can't be changed in place.
+
+    Writing to it through a story context (see Dict#set) replaces it
+    with a copy in that context first, so that only the story writing to
+    it sees the change.
+    """
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f'{type(self).__name__} can\'t be changed in place')
+
+    __setitem__ = _read_only
+    __delitem__ = _read_only
+    setdefault = _read_only
+    pop = _read_only
+    popitem = _read_only
+    clear = _read_only
+    update = _read_only
+
+    def __copy__(self):
+        return self.copy()
+
+    def __reduce__(self):
+        return dict, (dict(self),)
@@ -28,6 +28,27 @@ class Resolver:
             return string.format(*values)
         return string
 
+    @staticmethod
+    def sum(result, values):
+        """
+        Adds values to result. Numbers are added up, until either one
+        isn't a number, from which on all values are concatenated as
+        strings (joined at once, rather than one by one).
+        """
+        parts = None
+        for r in values:
+            if parts is not None:
+                parts.append(str(r))
+            elif type(r) in (int, float) and type(result) in (int, float):
+                result += r
+            else:
+                parts = [str(result), str(r)]
+
+        if parts is None:
+            return result
+
+        return ''.join(parts)
+
     @classmethod
     def path(cls, paths, data):
         """
@@ -172,21 +193,12 @@ class Resolver:
 
             return True
         elif a == 'sum':
-            result = left
-
             assert type(left) in (int, float, str)
             # Sum supports flattened values since this only occurs when
             # a string like "{a} {b} {c}" is compiled. Everything else,
             # including arithmetic is compiled as a nested expression.
-            for i in range(1, len(values)):
-                r = cls.resolve(values[i], data)
-
-                if type(r) in (int, float) and type(result) in (int, float):
-                    result += r
-                else:
-                    result = f'{str(result)}{str(r)}'
-
-            return result
+            return cls.sum(left, [cls.resolve(value, data)
+                                  for value in values[1:]])
         elif a == 'subtraction':
             right = cls.resolve(values[1], data)
             assert type(left) in (int, float)
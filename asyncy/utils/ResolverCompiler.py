@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+import operator
+import re
+from functools import partial
+
+from .Constant import Constant
+from .Dict import Dict
+from .Resolver import Resolver
+from .TypeResolver import TypeResolver
+from ..Exceptions import StoryscriptRuntimeError
+
+
+class ResolverCompiler:
+    """
+    Compiles objects found in a story tree into functions. A compiled
+    object is a function which takes the context (data) and returns exactly
+    what Resolver#resolve would return for that object, without having to
+    re-interpret the object on every evaluation.
+
+    Objects which don't depend on the context (literals, regular
+    expressions, and anything made of these only) are resolved once, when
+    compiling (see ResolverCompiler#fold).
+    """
+
+    objects = {
+        'string': 'string',
+        'dot': 'literal',
+        'int': 'literal',
+        'boolean': 'literal',
+        'float': 'literal',
+        'path': 'path',
+        'regexp': 'regexp',
+        'value': 'literal',
+        'dict': 'dict',
+        'list': 'list_object',
+        'expression': 'expression',
+        'assertion': 'expression',
+        'type_cast': 'type_cast',
+        'type': 'type_cast'
+    }
+
+    comparisons = {
+        'equals': operator.eq,
+        'equal': operator.eq,
+        'not_equal': operator.ne,
+        'greater': operator.gt,
+        'greater_equal': operator.ge,
+        'less': operator.lt,
+        'less_equal': operator.le
+    }
+
+    arithmetic_operations = {
+        'subtraction': (operator.sub, (int, float)),
+        'multiplication': (operator.mul, (int, float, str)),
+        'modulus': (operator.mod, (int, float)),
+        'division': (operator.truediv, (int, float, str)),
+        'exponential': (operator.pow, (int, float))
+    }
+
+    @classmethod
+    def compile(cls, item):
+        """
+        Compiles item. Should item be malformed, it's left to Resolver
+        to resolve (and fail) at runtime, just like it would have.
+        """
+        try:
+            return cls.resolve(item)
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return partial(cls.interpret, item)
+
+    @staticmethod
+    def interpret(item, data):
+        return Resolver.resolve(item, data)
+
+    @staticmethod
+    def constant(value):
+        return Constant(value)
+
+    @classmethod
+    def fold(cls, compiled, values):
+        """
+        Resolves compiled right away, should all the values which it's made
+        of be constant. If resolving fails, it's left to fail at runtime,
+        just like it would have.
+        """
+        for value in values:
+            if not isinstance(value, Constant):
+                return compiled
+
+        try:
+            return cls.constant(compiled(None))
+        except Exception:
+            return compiled
+
+    @classmethod
+    def resolve(cls, item):
+        if type(item) is dict:
+            return cls.object(item)
+        elif type(item) is list:
+            return cls.list(item)
+        return cls.constant(item)
+
+    @classmethod
+    def object(cls, item):
+        if not isinstance(item, dict):
+            return cls.constant(item)
+
+        name = cls.objects.get(item.get('$OBJECT'))
+        if name is None:
+            return cls.dictionary(item)
+
+        return getattr(cls, name)(item)
+
+    @classmethod
+    def string(cls, item):
+        string = item['string']
+        if not item.get('values'):
+            return cls.constant(string)
+
+        values = [cls.resolve(value) for value in item['values']]
+
+        def string_(data):
+            return string.format(*[value(data) for value in values])
+
+        return cls.fold(string_, values)
+
+    @classmethod
+    def literal(cls, item):
+        return cls.constant(item[item['$OBJECT']])
+
+    @classmethod
+    def regexp(cls, item):
+        pattern = item['regexp']
+        try:
+            return cls.constant(re.compile(pattern))
+        except re.error:
+            return lambda data: re.compile(pattern)
+
+    @classmethod
+    def path(cls, item):
+        paths = item['paths']
+        head = paths[0]
+        segments = []
+        for path in paths[1:]:
+            if isinstance(path, str):
+                # Resolver doesn't support these, so neither do we.
+                return partial(cls.interpret, item)
+
+            if path.get('$OBJECT') == 'range':
+                segments.append(cls.range(path['range']))
+            else:
+                segments.append(cls.index(path))
+
+        def path_(data):
+            try:
+                item = data[head]
+                for segment in segments:
+                    item = segment(item, data)
+                return item
+            except (KeyError, TypeError):
+                return None
+
+        return path_
+
+    @classmethod
+    def setter(cls, keys):
+        """
+        Compiles an assignment to the path keys (the name of a line) into
+        a function which takes the context and the value to assign, and
+        does exactly what Dict#set would do.
+        """
+        try:
+            return cls.assignment(keys)
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return lambda data, value: Dict.set(data, keys, value)
+
+    @classmethod
+    def assignment(cls, keys):
+        head = keys[0]
+        if len(keys) == 1:
+            def set_variable(data, value):
+                data[head] = value
+
+            return set_variable
+
+        parents = keys[1:-1]
+        last = keys[-1]
+        try:
+            index = cls.constant(Dict.parse_int(last))
+        except Exception:
+            # Fails if (and when) a list is assigned to, as it would have.
+            def index(data):
+                return Dict.parse_int(last)
+
+        if isinstance(last, dict) and last.get('$OBJECT') == 'path':
+            key = cls.path(last)
+        else:
+            key = cls.constant(Dict.parse_map_key(last, None))
+
+        def set_(data, value):
+            cur = Dict.writable_child(data, head)
+            for parent in parents:
+                cur = Dict.writable_child(cur, parent)
+
+            if isinstance(cur, list):
+                cur[index(data)] = value
+            else:
+                cur[key(data)] = value
+
+        return set_
+
+    @classmethod
+    def index(cls, path):
+        key = cls.object(path)
+
+        def index(item, data):
+            resolved = key(data)
+            try:
+                return item[resolved]
+            except IndexError:
+                raise StoryscriptRuntimeError(
+                    message=f'List index out of bounds: {resolved}')
+
+        return index
+
+    @classmethod
+    def range(cls, path):
+        start = cls.object(path['start']) if 'start' in path else None
+        end = cls.object(path['end']) if 'end' in path else None
+
+        def range_(item, data):
+            start_ = 0 if start is None else start(data)
+            end_ = len(item) if end is None else end(data)
+            return item[start_:end_]
+
+        return range_
+
+    @classmethod
+    def dict(cls, item):
+        items = [(cls.object(k), cls.object(v)) for k, v in item['items']]
+
+        def dict_(data):
+            result = {}
+            for key, value in items:
+                k = key(data)
+                if k in (list, tuple, dict):
+                    continue
+                result[k] = value(data)
+            return result
+
+        return cls.fold(dict_, [f for pair in items for f in pair])
+
+    @classmethod
+    def list_object(cls, item):
+        items = [cls.resolve(i) for i in item['items']]
+        return cls.fold(lambda data: [i(data) for i in items], items)
+
+    @classmethod
+    def list(cls, items):
+        items = [cls.resolve(i) for i in items]
+        return cls.fold(lambda data: ' '.join([i(data) for i in items]),
+                        items)
+
+    @classmethod
+    def dictionary(cls, item):
+        items = [(key, cls.resolve(value)) for key, value in item.items()]
+
+        def dictionary_(data):
+            result = {}
+            for key, value in items:
+                try:
+                    result[key] = value(data)
+                except KeyError:
+                    raise StoryscriptRuntimeError(
+                        message=f'Invalid key access: {key}')
+            return result
+
+        return cls.fold(dictionary_, [value for key, value in items])
+
+    @classmethod
+    def type_cast(cls, item):
+        type_ = item['type']
+        value = cls.object(item['value'])
+        return cls.fold(
+            lambda data: TypeResolver.type_cast(value(data), type_, data),
+            [value])
+
+    @classmethod
+    def expression(cls, item):
+        """
+        Compiles expressions, as supported by Resolver#expression.
+        """
+        a = item.get('assertion', item.get('expression'))
+        values = [cls.resolve(value) for value in item['values']]
+        left = values[0]
+
+        if a in cls.comparisons:
+            compiled = cls.comparison(left, values[1], cls.comparisons[a])
+        elif a in cls.arithmetic_operations:
+            operation, types = cls.arithmetic_operations[a]
+            compiled = cls.arithmetic(left, values[1], operation, types)
+        elif a == 'not':
+            compiled = cls.not_(left)
+        elif a == 'or':
+            compiled = cls.or_(values)
+        elif a == 'and':
+            compiled = cls.and_(values)
+        elif a == 'sum':
+            compiled = cls.sum(values)
+        else:
+            compiled = None
+
+        if compiled is not None:
+            return cls.fold(compiled, values)
+
+        def unsupported(data):
+            left(data)
+            assert False, f'Unsupported operation: {a}'
+
+        return unsupported
+
+    @staticmethod
+    def comparison(left, right, operation):
+        return lambda data: operation(left(data), right(data))
+
+    @staticmethod
+    def arithmetic(left, right, operation, types):
+        def arithmetic_(data):
+            lhs = left(data)
+            rhs = right(data)
+            assert type(lhs) in types
+            assert type(rhs) in types
+            return operation(lhs, rhs)
+
+        return arithmetic_
+
+    @staticmethod
+    def not_(value):
+        return lambda data: not value(data)
+
+    @staticmethod
+    def or_(values):
+        def or_(data):
+            for value in values:
+                if value(data) is True:
+                    return True
+            return False
+
+        return or_
+
+    @staticmethod
+    def and_(values):
+        def and_(data):
+            for value in values:
+                if value(data) is False:
+                    return False
+            return True
+
+        return and_
+
+    @staticmethod
+    def sum(values):
+        left = values[0]
+        rest = values[1:]
+
+        def sum_(data):
+            result = left(data)
+            assert type(result) in (int, float, str)
+            return Resolver.sum(result, [value(data) for value in rest])
+
+        return sum_
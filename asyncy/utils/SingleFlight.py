@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+
+class SingleFlight:
+    """
+    Shares the result of a call among all the callers which make the same
+    call (by key) while it's in flight, rather than making it once each.
+    """
+    __slots__ = ('calls',)
+
+    def __init__(self):
+        self.calls = {}
+
+    def __len__(self):
+        return len(self.calls)
+
+    async def do(self, key, call):
+        """
+        Returns the result of call(), or of the call in flight by key.
+
+        Cancelling a caller doesn't cancel the call, since others may be
+        waiting for it.
+        """
+        future = self.calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self.calls[key] = future
+            future.add_done_callback(
+                lambda done: self.complete(key, done))
+
+        return await asyncio.shield(future)
+
+    def complete(self, key, future):
+        if self.calls.get(key) is future:
+            del self.calls[key]
+
+        if not future.cancelled():
+            # Retrieved, should all the callers have been cancelled.
+            future.exception()
@@ -16,3 +16,19 @@ class StringUtils:
                      f'({truncated_len} bytes truncated)'
 
         return result
+
+
+class Truncated:
+    """
+    A value which is truncated (see StringUtils#truncate) only when it's
+    formatted, so that it's never converted to a string unless it's
+    actually logged.
+    """
+    __slots__ = ('value', 'max_bytes')
+
+    def __init__(self, value, max_bytes: int):
+        self.value = value
+        self.max_bytes = max_bytes
+
+    def __str__(self):
+        return str(StringUtils.truncate(self.value, self.max_bytes))
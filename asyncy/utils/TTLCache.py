@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    A cache of values which expire a while after they're put, holding
+    values of up to max_size in total (their sizes are given when they're
+    put), and evicting the least recently used value first.
+    """
+
+    def __init__(self, max_size: int):
+        assert max_size > 0
+        self.max_size = max_size
+        self.size = 0
+        self._items = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        item = self._items.get(key)
+        if item is None:
+            return default
+
+        expires, size, value = item
+        if expires <= time.time():
+            self.remove(key)
+            return default
+
+        self._items.move_to_end(key)
+        return value
+
+    def put(self, key, value, size: int, ttl: float):
+        """
+        Caches value for ttl seconds. Values larger than the cache itself
+        aren't cached.
+        """
+        self.remove(key)
+        if size > self.max_size:
+            return
+
+        self._items[key] = (time.time() + ttl, size, value)
+        self.size += size
+        while self.size > self.max_size:
+            _, (_, evicted, _) = self._items.popitem(last=False)
+            self.size -= evicted
+
+    def remove(self, key):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.size -= item[1]
+
+    def clear(self):
+        self._items.clear()
+        self.size = 0
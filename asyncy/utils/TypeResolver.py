@@ -2,6 +2,7 @@
 import re
 
 from asyncy.Exceptions import TypeAssertionRuntimeError, TypeValueRuntimeError
+from asyncy.utils.LRUCache import LRUCache
 
 import storyscript.compiler.semantics.types.Types as types
 
@@ -19,6 +20,29 @@ class TypeAssertionError(Exception):
 
 class TypeResolver:
 
+    parsed_types = LRUCache(1024)
+    """
+    Parsed types and their casts, keyed by the id of their descriptor
+    (see TypeResolver#parse_type).
+    """
+
+    @classmethod
+    def parse_type(cls, type_):
+        """
+        Returns the type described by type_ (as found in a story tree), and
+        the function which casts items to it. Both are cached, since the
+        same descriptors are cast to on every run of a story.
+        """
+        key = id(type_)
+        parsed = cls.parsed_types.get(key)
+        if parsed is None or parsed[0] is not type_:
+            # The descriptor is kept along, so that its id isn't reused.
+            t = cls.resolve_type(type_)
+            parsed = (type_, t, cls.caster(t))
+            cls.parsed_types.put(key, parsed)
+
+        return parsed[1], parsed[2]
+
     @classmethod
     def resolve_type(cls, item):
         assert isinstance(item, dict)
@@ -82,38 +106,116 @@ class TypeResolver:
 
     @classmethod
     def check_type_cast(cls, type_exp, item):
-        if item is None:
-            return None
-        elif isinstance(type_exp, types.ListType):
-            cls.assert_type([list], item)
-            li = []
-            for el in item:
-                li.append(cls.check_type_cast(type_exp.inner, el))
-            return li
+        return cls.caster(type_exp)(item)
+
+    @classmethod
+    def caster(cls, type_exp):
+        """
+        Compiles casting items to type_exp into a function.
+
+        Lists and maps whose items already are exactly of the types
+        expected are copied at once, rather than cast item by item.
+        """
+        if isinstance(type_exp, types.ListType):
+            return cls.list_caster(type_exp)
         elif isinstance(type_exp, types.MapType):
-            cls.assert_type([dict], item)
-            obj = {}
-            for k, v in item.items():
-                key = cls.check_type_cast(type_exp.key, k)
-                value = cls.check_type_cast(type_exp.value, v)
-                obj[key] = value
-            return obj
+            return cls.map_caster(type_exp)
         elif isinstance(type_exp, types.BooleanType):
-            return bool(item)
+            cast = bool
         elif isinstance(type_exp, types.IntType):
-            return int(item)
+            cast = int
         elif isinstance(type_exp, types.FloatType):
-            return float(item)
+            cast = float
         elif isinstance(type_exp, types.StringType):
-            return str(item)
+            cast = str
         elif isinstance(type_exp, types.AnyType):
-            return item
+            return cls.any
         else:
             assert isinstance(type_exp, types.RegExpType)
-            cls.assert_type([str, RE_PATTERN], item)
-            if isinstance(item, str):
-                return re.compile(item)
-            return item
+            cast = cls.regexp
+
+        def cast_(item):
+            if item is None:
+                return None
+            return cast(item)
+
+        return cast_
+
+    @staticmethod
+    def any(item):
+        return item
+
+    @classmethod
+    def regexp(cls, item):
+        cls.assert_type([str, RE_PATTERN], item)
+        if isinstance(item, str):
+            return re.compile(item)
+        return item
+
+    @staticmethod
+    def exact_type(type_exp):
+        """
+        The Python type which items cast to type_exp may be kept as they
+        are in, object for any type, or None if they're always cast.
+        """
+        if isinstance(type_exp, types.AnyType):
+            return object
+        elif isinstance(type_exp, types.BooleanType):
+            return bool
+        elif isinstance(type_exp, types.IntType):
+            return int
+        elif isinstance(type_exp, types.FloatType):
+            return float
+        elif isinstance(type_exp, types.StringType):
+            return str
+        return None
+
+    @staticmethod
+    def matches(exact, items):
+        if exact is object:
+            return True
+        elif exact is None:
+            return False
+        return set(map(type, items)) <= {exact}
+
+    @classmethod
+    def list_caster(cls, type_exp):
+        inner = cls.caster(type_exp.inner)
+        exact = cls.exact_type(type_exp.inner)
+
+        def cast_list(item):
+            if item is None:
+                return None
+
+            cls.assert_type([list], item)
+            if cls.matches(exact, item):
+                return list(item)
+            return [inner(el) for el in item]
+
+        return cast_list
+
+    @classmethod
+    def map_caster(cls, type_exp):
+        key = cls.caster(type_exp.key)
+        value = cls.caster(type_exp.value)
+        exact_key = cls.exact_type(type_exp.key)
+        exact_value = cls.exact_type(type_exp.value)
+
+        def cast_map(item):
+            if item is None:
+                return None
+
+            cls.assert_type([dict], item)
+            if cls.matches(exact_key, item.keys()) \
+                    and cls.matches(exact_value, item.values()):
+                return dict(item)
+
+            obj = {}
+            for k, v in item.items():
+                obj[key(k)] = value(v)
+            return obj
+
+        return cast_map
 
     @staticmethod
     def item_to_string(item):
@@ -126,16 +228,14 @@ class TypeResolver:
 
     @classmethod
     def type_cast(cls, item, type_, data):
-        t = cls.resolve_type(type_)
-        value = cls.item_to_string(item)
-        type_received = cls.type_string(item)
+        t, cast = cls.parse_type(type_)
         try:
-            return cls.check_type_cast(t, item)
+            return cast(item)
         except (TypeError, TypeAssertionError):
-            raise TypeAssertionRuntimeError(type_expected=t,
-                                            type_received=type_received,
-                                            value=value)
+            raise TypeAssertionRuntimeError(
+                type_expected=t, type_received=cls.type_string(item),
+                value=cls.item_to_string(item))
         except (ValueError, re.error):
-            raise TypeValueRuntimeError(type_expected=t,
-                                        type_received=type_received,
-                                        value=value)
+            raise TypeValueRuntimeError(
+                type_expected=t, type_received=cls.type_string(item),
+                value=cls.item_to_string(item))
@@ -41,6 +41,10 @@ setup(
         'psycopg2==2.7.5',
         'requests==2.21.0'  # Used for structures like CaseInsensitiveDict.
     ],
+    extras_require={
+        # Keeps connections to services alive (see HttpUtils#configure).
+        'curl': ['pycurl==7.43.0.2']
+    },
     classifiers=[
         'Environment :: Console',
         'Intended Audience :: Developers',
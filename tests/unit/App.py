@@ -3,6 +3,7 @@ import asyncio
 import json
 from collections import deque
 
+from asyncy import Metrics
 from asyncy.App import App, AppData
 from asyncy.AppConfig import Expose
 from asyncy.Containers import Containers
@@ -14,6 +15,7 @@ from asyncy.entities.Release import Release
 from asyncy.processing import Story
 from asyncy.processing.Services import Command, Service, Services
 from asyncy.utils.HttpUtils import HttpUtils
+from asyncy.utils.ReadOnlyDict import ReadOnlyDict
 
 import pytest
 from pytest import fixture, mark
@@ -185,6 +187,7 @@ def test_app_init(magic, config, logger, env, always_pull_images):
     assert app.services == services
     assert app.always_pull_images == always_pull_images
     assert app.environment == env
+    assert isinstance(app.app_context, ReadOnlyDict)
     assert app.app_context['hostname'] == f'{app.app_dns}.asyncyapp.com'
     assert app.app_context['version'] == version
     assert app.app_context['secrets'] == expected_secrets
@@ -426,3 +429,67 @@ async def test_app_destroy(patch, app, async_mock):
 
     app.unsubscribe_all.mock.assert_called()
     app.clear_subscriptions_synapse.mock.assert_called()
+
+
+@mark.asyncio
+async def test_app_destroy_cancels_runs(patch, app, async_mock, magic):
+    run = magic()
+    app.runs.add(run)
+    patch.object(app, 'unsubscribe_all', new=async_mock())
+    patch.object(app, 'clear_subscriptions_synapse', new=async_mock())
+    await app.destroy()
+
+    run.cancel.assert_called_once()
+    assert app.runs == set()
+
+
+@mark.parametrize('longest_slice', [0, 0.1])
+@mark.asyncio
+async def test_app_destroy_longest_slice(patch, app, async_mock,
+                                         longest_slice):
+    app.longest_slice = longest_slice
+    patch.object(Metrics, 'story_longest_slice_seconds')
+    patch.object(app, 'unsubscribe_all', new=async_mock())
+    patch.object(app, 'clear_subscriptions_synapse', new=async_mock())
+    await app.destroy()
+
+    assert app.longest_slice == 0
+    if longest_slice > 0:
+        Metrics.story_longest_slice_seconds.remove \
+            .assert_called_with(app.app_id)
+    else:
+        Metrics.story_longest_slice_seconds.remove.assert_not_called()
+
+
+def test_app_get_story_timeout(patch, app):
+    patch.object(app.app_config, 'get_story_timeout', return_value=None)
+    app.story_timeout = 0
+    assert app.get_story_timeout('foo') is None
+    app.story_timeout = 60
+    assert app.get_story_timeout('foo') == 60
+    app.app_config.get_story_timeout.return_value = 5
+    assert app.get_story_timeout('foo') == 5
+    app.app_config.get_story_timeout.assert_called_with('foo')
+
+
+def test_app_get_bulkhead(patch, app):
+    patch.object(app.app_config, 'get_bulkhead', return_value=(None, None))
+    app.config.SERVICE_CONCURRENCY = 0
+    app.config.SERVICE_QUEUE_SIZE = 8
+    assert app.get_bulkhead('foo') is None
+
+    app.app_config.get_bulkhead.return_value = (2, None)
+    bulkhead = app.get_bulkhead('bar')
+    assert (bulkhead.concurrency, bulkhead.queue_size) == (2, 8)
+    assert app.get_bulkhead('bar') is bulkhead
+    assert app.app_config.get_bulkhead.call_count == 2
+
+
+def test_app_get_cache_ttl(patch, app):
+    patch.object(app.app_config, 'get_cache_ttl', return_value=None)
+    assert app.get_cache_ttl('geo', 'lookup', {}) is None
+    assert app.get_cache_ttl('geo', 'lookup', {'cache': {'ttl': 30}}) == 30
+
+    app.app_config.get_cache_ttl.return_value = 0
+    assert app.get_cache_ttl('geo', 'lookup', {'cache': {'ttl': 30}}) is None
+    app.app_config.get_cache_ttl.assert_called_with('geo', 'lookup')
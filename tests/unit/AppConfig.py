@@ -2,6 +2,9 @@
 from operator import attrgetter
 
 from asyncy.AppConfig import AppConfig
+from asyncy.enums.ResultRetention import ResultRetention
+
+from pytest import raises
 
 
 def test_app_config():
@@ -30,3 +33,83 @@ def test_app_config():
         assert exposes[i].service == f'service_{i}'
         assert exposes[i].http_path == f'/my_expose_path_{i}'
         assert exposes[i].service_expose_name == f'expose_name_{i}'
+
+
+def test_app_config_log_sample_rate():
+    assert AppConfig({}).get_log_sample_rate() is None
+    config = AppConfig({'logging': {'sample_rate': '0.25'}})
+    assert config.get_log_sample_rate() == 0.25
+
+
+def test_app_config_log_sample_rate_invalid():
+    with raises(AssertionError):
+        AppConfig({'logging': {'sample_rate': 2}})
+
+
+def test_app_config_results():
+    config = AppConfig({})
+    assert config.get_results_retention() is None
+    assert config.get_results_timings_size() is None
+
+    config = AppConfig({
+        'results': {'retention': 'timings', 'timings_size': '128'}
+    })
+    assert config.get_results_retention() == ResultRetention.TIMINGS
+    assert config.get_results_timings_size() == 128
+
+
+def test_app_config_results_invalid():
+    with raises(ValueError):
+        AppConfig({'results': {'retention': 'some'}})
+
+
+def test_app_config_loop_concurrency():
+    config = AppConfig({})
+    assert config.get_loop_concurrency('a.story', '1') == 1
+
+    config = AppConfig({
+        'loops': {'parallel': {'a.story': 5, 'a.story:10': '20'}}
+    })
+    assert config.get_loop_concurrency('a.story', '1') == 5
+    assert config.get_loop_concurrency('a.story', '10') == 20
+    assert config.get_loop_concurrency('b.story', '10') == 1
+
+
+def test_app_config_concurrent_calls():
+    assert AppConfig({}).get_concurrent_calls() is False
+    config = AppConfig({'calls': {'concurrent': True}})
+    assert config.get_concurrent_calls() is True
+
+
+def test_app_config_profiling():
+    assert AppConfig({}).get_profiling() is False
+    assert AppConfig({'profiling': {'enabled': True}}).get_profiling() is True
+
+
+def test_app_config_story_timeout():
+    assert AppConfig({}).get_story_timeout('foo') is None
+    config = AppConfig({'timeouts': {'default': 30,
+                                     'stories': {'foo': '2.5'}}})
+    assert config.get_story_timeout('foo') == 2.5
+    assert config.get_story_timeout('bar') == 30
+
+
+def test_app_config_bulkhead():
+    config = AppConfig({'bulkheads': {'foo': {'concurrency': 4,
+                                              'queue': '10'},
+                                      'bar': {'queue': 0}}})
+    assert config.get_bulkhead('foo') == (4, 10)
+    assert config.get_bulkhead('bar') == (None, 0)
+    assert config.get_bulkhead('baz') == (None, None)
+
+
+def test_app_config_coalesce_calls():
+    assert AppConfig({}).get_coalesce_calls() is False
+    config = AppConfig({'calls': {'coalesce': True}})
+    assert config.get_coalesce_calls() is True
+
+
+def test_app_config_cache_ttl():
+    config = AppConfig({'cache': {'geo': {'lookup': 60}}})
+    assert config.get_cache_ttl('geo', 'lookup') == 60
+    assert config.get_cache_ttl('geo', 'other') is None
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import time
+
+from asyncy.LineResults import FullLineResults, LineResults, LineTimings
+from asyncy.enums.ResultRetention import ResultRetention
+
+from pytest import mark, raises
+
+
+@mark.parametrize('retention,results_type', [
+    (ResultRetention.OFF, LineResults),
+    (ResultRetention.TIMINGS, LineTimings),
+    (ResultRetention.FULL, FullLineResults),
+    ('timings', LineTimings),
+    (None, FullLineResults)
+])
+def test_line_results_new(retention, results_type):
+    assert type(LineResults.new(retention, 10)) is results_type
+
+
+def test_line_results_off():
+    results = LineResults()
+    results.start('1')
+    results.end('1', 'output')
+    assert not hasattr(results, '__dict__')
+
+
+def test_line_timings(patch):
+    patch.object(time, 'time', side_effect=range(100))
+    timings = LineTimings(3)
+    timings.start('1')
+    timings.start('2')
+    timings.end('2', 'output')
+    timings.end('1', 'output')
+    assert timings.timings() == [('2', 1, 2), ('1', 0, 3)]
+
+
+def test_line_timings_nested(patch):
+    patch.object(time, 'time', side_effect=range(100))
+    timings = LineTimings(3)
+    timings.start('1')
+    timings.start('1')
+    timings.end('1', 'output')
+    timings.end('1', 'output')
+    assert timings.timings() == [('1', 1, 2), ('1', 0, 3)]
+    assert timings._started == {}
+
+
+def test_line_timings_ring(patch):
+    patch.object(time, 'time', side_effect=range(100))
+    timings = LineTimings(3)
+    for i in range(5):
+        timings.start(str(i))
+        timings.end(str(i), 'output')
+
+    assert timings.count == 5
+    assert len(timings.starts) == 3
+    assert [t[0] for t in timings.timings()] == ['2', '3', '4']
+    assert timings.timings()[0] == ('2', 4, 5)
+
+
+def test_line_timings_size():
+    with raises(AssertionError):
+        LineTimings(0)
+
+
+def test_full_line_results(patch):
+    patch.object(time, 'time', side_effect=[1, 2])
+    results = FullLineResults()
+    results.start('1')
+    results.end('1', 'output')
+    assert results == {'1': {'output': 'output', 'start': 1, 'end': 2}}
+
+
+def test_line_results_merge():
+    results = LineResults()
+    results.merge(LineResults())
+
+    timings = LineTimings(3)
+    timings.add('1', 1, 2)
+    other = LineTimings(3)
+    other.add('2', 3, 4)
+    other.add('3', 5, 6)
+    timings.merge(other)
+    assert timings.timings() == [('1', 1, 2), ('2', 3, 4), ('3', 5, 6)]
+
+    full = FullLineResults({'1': {'start': 1}})
+    full.merge(FullLineResults({'2': {'start': 2}}))
+    assert full == {'1': {'start': 1}, '2': {'start': 2}}
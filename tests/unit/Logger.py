@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import json
 import logging
+import random
 from io import StringIO
 from logging import LoggerAdapter
 
@@ -91,7 +92,7 @@ def test_logger_events_story_execute(logger):
 
 
 def test_logger_events_story_resolve(logger):
-    message = 'Resolved "{}" to "{}"'
+    message = 'Resolved "{}" to "{}" with type {}'
     assert logger.events[8] == ('story-resolve', 'debug', message)
 
 
@@ -115,6 +116,16 @@ def test_logger_events_http_run_story(logger):
     assert logger.events[12] == ('http-request-run-story', 'debug', message)
 
 
+def test_logger_events_lexicon_mutation(logger):
+    message = 'Mutation result: {}'
+    assert logger.events[13] == ('lexicon-mutation', 'debug', message)
+
+
+def test_logger_events_service_invoke(logger):
+    message = 'Invoking service on {} with payload {}'
+    assert logger.events[14] == ('service-invoke', 'debug', message)
+
+
 def test_logger_adapter(patch, magic, logger):
     patch.init(Adapter)
     logger.frustum = magic()
@@ -204,6 +215,30 @@ def test_logger_log_args(patch, logger):
     Frustum.log.assert_called_with('my-event', 'extra', 'args')
 
 
+@mark.parametrize('enabled', [True, False])
+def test_logger_hot(patch, logger, enabled):
+    patch.object(logger, 'frustum')
+    logger.frustum.logger.isEnabledFor.return_value = enabled
+    logger.hot('story-execution', '1')
+    logger.frustum.logger.isEnabledFor.assert_called_with(logging.DEBUG)
+    if enabled:
+        logger.frustum.log.assert_called_with('story-execution', '1')
+    else:
+        logger.frustum.log.assert_not_called()
+
+
+@mark.parametrize('sample', [0.2, 0.8])
+def test_logger_hot_sampled(patch, logger, sample):
+    patch.object(logger, 'frustum')
+    patch.object(random, 'random', return_value=sample)
+    logger.sample_rate = 0.5
+    logger.hot('story-execution', '1')
+    if sample < logger.sample_rate:
+        logger.frustum.log.assert_called_with('story-execution', '1')
+    else:
+        logger.frustum.log.assert_not_called()
+
+
 def test_logger_log_info(patch, logger):
     patch.object(logger, 'frustum')
     logger.info('my-event')
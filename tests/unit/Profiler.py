@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import time
+
+from asyncy import Metrics
+from asyncy.Profiler import Profiler
+
+from pytest import fixture
+
+
+@fixture
+def profiler(patch):
+    patch.many(Metrics, ['line_self_seconds', 'line_service_seconds'])
+    return Profiler('app_id')
+
+
+def test_profiler_enter_exit(patch, profiler, story):
+    patch.object(time, 'time', side_effect=[0, 1, 3, 4])
+    outer = profiler.enter(story, '1')
+    inner = profiler.enter(story, '2')
+    assert story.run.profile_frame is inner
+    assert inner.parent is outer
+
+    Profiler.service_time(story, 1.5)
+    profiler.exit(story, inner)
+    assert story.run.profile_frame is outer
+    assert outer.children_time == 2
+
+    profiler.exit(story, outer)
+    assert story.run.profile_frame is None
+
+    inner_profile = profiler.lines[(story.name, '2')]
+    assert inner_profile.calls == 1
+    assert inner_profile.wall_time == 2
+    assert inner_profile.self_time == 2
+    assert inner_profile.service_time == 1.5
+
+    outer_profile = profiler.lines[(story.name, '1')]
+    assert outer_profile.wall_time == 4
+    assert outer_profile.self_time == 2
+    assert outer_profile.service_time == 0
+
+    Metrics.line_self_seconds.labels.assert_called_with(
+        app_id='app_id', story_name=story.name, line='1')
+    Metrics.line_self_seconds.labels().observe.assert_called_with(2)
+    Metrics.line_service_seconds.labels().observe \
+        .assert_called_once_with(1.5)
+
+
+def test_profiler_service_time_not_profiling(story):
+    Profiler.service_time(story, 1)
+    assert story.run.profile_frame is None
+
+
+def test_profiler_report(patch, profiler, story):
+    patch.object(time, 'time', side_effect=[0, 1, 1, 4, 4, 5])
+    for line_number in ('1', '2', '1'):
+        profiler.exit(story, profiler.enter(story, line_number))
+
+    report = profiler.report()
+    assert [line['line'] for line in report] == ['2', '1']
+    assert report[1] == {
+        'story_name': story.name,
+        'line': '1',
+        'calls': 2,
+        'wall_time': 2,
+        'self_time': 2,
+        'service_time': 0,
+        'max_time': 1,
+        'mean_time': 1
+    }
+    assert len(profiler.report(1)) == 1
+
+    profiler.reset()
+    assert profiler.report() == []
@@ -2,8 +2,12 @@
 import pathlib
 import time
 
+from asyncy.LineResults import FullLineResults, LineResults, LineTimings
 from asyncy.Stories import MAX_BYTES_LOGGING, Stories
+from asyncy.StoryProgram import StoryProgram
+from asyncy.StoryRun import StoryRun
 from asyncy.utils import Dict, Resolver
+from asyncy.utils.ReadOnlyDict import ReadOnlyDict
 
 from pytest import mark
 
@@ -78,8 +82,8 @@ def test_get_str_for_logging(long):
         assert actual_val == 'hello world'
 
 
-def test_stories_line(magic, story):
-    story.tree = magic()
+def test_stories_line(story):
+    story.tree = {'1': {'ln': '1'}}
     line = story.line('1')
     assert line == story.tree['1']
 
@@ -97,13 +101,83 @@ def test_stories_first_line(patch, story):
     assert result == '16'
 
 
-def test_stories_function_line_by_name(patch, story):
-    patch.object(story, 'line')
-    ret = story.function_line_by_name('execute')
-    story.line.assert_called_with(
-        story.app.stories[story.name]['functions']['execute'])
+def test_stories_function_line_by_name(story):
+    story.program = StoryProgram.compile({
+        'tree': {'1': {'ln': '1', 'method': 'function'}},
+        'entrypoint': '1',
+        'functions': {'execute': '1'}
+    })
+    assert story.function_line_by_name('execute') is story.tree['1']
+
 
-    assert ret == story.line()
+@mark.parametrize('retention,results_type', [
+    ('off', LineResults),
+    ('timings', LineTimings),
+    ('full', FullLineResults)
+])
+def test_stories_init_results(app, logger, retention, results_type):
+    app.results_retention = retention
+    app.results_timings_size = 10
+    story = Stories(app, 'hello.story', logger)
+    assert type(story.results) is results_type
+
+
+def test_stories_fork_and_join(story):
+    shared = {'foo': 'bar'}
+    story.context = {'a': 1, 'shared': shared, 'same': 'x'}
+    with story.new_frame('1'):
+        fork = story.fork({'a': 1, 'shared': shared, 'same': 'x', 'b': 2})
+        assert fork.get_stack() == ['1']
+
+    assert fork.run is not story.run
+    assert fork.results is not story.results
+    assert fork.execution_id == story.execution_id
+    fork.context['a'] = 3
+    fork.context['item'] = 'item'
+    fork.start_line('2')
+    fork.end_line('2', output='output')
+
+    run = fork.run
+    story.join(fork, exclude='item')
+    assert story.context == {'a': 3, 'shared': shared, 'same': 'x', 'b': 2}
+    assert story.results['2']['output'] == 'output'
+    assert fork.run is None
+    assert StoryRun.acquire() is run
+
+
+def test_stories_join_base(story):
+    story.context = {'found': False, 'a': 1}
+    base = dict(story.context)
+    first = story.fork(dict(base))
+    second = story.fork(dict(base))
+    first.context['found'] = True
+    second.context['a'] = 2
+
+    story.join(first, base=base)
+    story.join(second, base=base)
+    assert story.context == {'found': True, 'a': 2}
+
+
+def test_stories_writable(story):
+    shared = ReadOnlyDict({'a': 1})
+    story.context = {'app': shared}
+    value = story.writable({'$OBJECT': 'path', 'paths': ['app']}, shared)
+    value['b'] = 2
+    assert story.context['app'] is value
+    assert shared == {'a': 1}
+
+    value = {'a': 1}
+    assert story.writable({'$OBJECT': 'path', 'paths': ['x']}, value) \
+        is value
+
+
+def test_stories_release(story):
+    run = story.run
+    story.context = {'foo': 'bar'}
+    story.release()
+    assert story.run is None
+    assert run.context is None
+    assert StoryRun.acquire() is run
 
 
 def test_stories_resolve(patch, logger, story):
@@ -113,6 +187,24 @@ def test_stories_resolve(patch, logger, story):
     assert result == 'args'
 
 
+def test_stories_resolve_logs_lazily(patch, story):
+    patch.object(Resolver, 'resolve', return_value='x' * 1000)
+    patch.object(story, 'logger')
+    story.resolve({'$OBJECT': 'path', 'paths': ['foo']})
+    event, arg, result, result_type = story.logger.hot.call_args[0]
+    assert event == 'story-resolve'
+    assert result_type == str
+    assert str(result) == Stories.get_str_for_logging('x' * 1000)
+
+
+def test_stories_resolve_compiled(story):
+    arg = {'$OBJECT': 'path', 'paths': ['foo']}
+    story.tree = {'1': {'ln': '1', 'args': [arg]}}
+    story.context = {'foo': 'bar'}
+    assert story.resolve(arg) == 'bar'
+    assert story.resolve({'$OBJECT': 'path', 'paths': ['foo']}) == 'bar'
+
+
 def test_command_arguments_list(patch, story):
     patch.object(Stories, 'resolve', return_value='something')
     obj = {'$OBJECT': 'string', 'string': 'string'}
@@ -140,7 +232,7 @@ def test_stories_start_line(patch, story):
 
 def test_stories_end_line(patch, story):
     patch.object(time, 'time')
-    story.results = {'1': {'start': 'start'}}
+    story.results = FullLineResults({'1': {'start': 'start'}})
     story.end_line('1')
     assert story.results['1']['output'] is None
     assert story.results['1']['end'] == time.time()
@@ -149,44 +241,54 @@ def test_stories_end_line(patch, story):
 
 def test_stories_end_line_output(patch, story):
     patch.object(time, 'time')
-    story.results = {'1': {'start': 'start'}}
+    story.results = FullLineResults({'1': {'start': 'start'}})
     story.end_line('1', output='output')
     assert story.results['1']['output'] == 'output'
 
 
 def test_stories_end_line_output_assign(patch, story):
     patch.object(Dict, 'set')
-    story.results = {'1': {'start': 'start'}}
+    story.results = FullLineResults({'1': {'start': 'start'}})
     assign = {'paths': ['x']}
     story.end_line('1', output='output', assign=assign)
     assert story.results['1']['output'] == 'output'
     Dict.set.assert_called_with(story.context, assign['paths'], 'output')
 
 
+def test_stories_set_variable_compiled(patch, story, magic):
+    patch.object(Dict, 'set')
+    name = ['x', 'y']
+    story.program = magic(setters={id(name): magic()})
+    story.set_variable({'paths': name}, 'output')
+    story.program.setters[id(name)].assert_called_with(story.context,
+                                                       'output')
+    Dict.set.assert_not_called()
+
+
 def test_stories_end_line_output_as_list(patch, story):
     patch.object(time, 'time')
-    story.results = {'1': {'start': 'start'}}
+    story.results = FullLineResults({'1': {'start': 'start'}})
     story.end_line('1', output=['a', 'b'])
     assert story.results['1']['output'] == ['a', 'b']
 
 
 def test_stories_end_line_output_as_json_no_auto_convert(patch, story):
     patch.object(time, 'time')
-    story.results = {'1': {'start': 'start'}}
+    story.results = FullLineResults({'1': {'start': 'start'}})
     story.end_line('1', output='{"key":"value"}')
     assert story.results['1']['output'] == '{"key":"value"}'
 
 
 def test_stories_end_line_output_as_sting(patch, story):
     patch.object(time, 'time')
-    story.results = {'1': {'start': 'start'}}
+    story.results = FullLineResults({'1': {'start': 'start'}})
     story.end_line('1', output='   foobar\n\t')
     assert story.results['1']['output'] == '   foobar\n\t'
 
 
 def test_stories_end_line_output_as_bytes(patch, story):
     patch.object(time, 'time')
-    story.results = {'1': {'start': 'start'}}
+    story.results = FullLineResults({'1': {'start': 'start'}})
     story.end_line('1', output=b'output')
     assert story.results['1']['output'] == b'output'
 
@@ -225,6 +327,16 @@ def test_stories_argument_by_name_lookup(patch, story):
     story.resolve.assert_called_with(line['args'][0]['argument'], encode=False)
 
 
+def test_stories_argument_by_name_compiled(patch, story, magic):
+    line = {'args': []}
+    story.program = magic(arguments={id(line): {'foo': 'arg'}})
+    patch.object(story, 'resolve')
+    assert story.argument_by_name(line, 'foo', encode=True) == \
+        story.resolve.return_value
+    story.resolve.assert_called_with('arg', encode=True)
+    assert story.argument_by_name(line, 'bar') is None
+
+
 def test_stories_argument_by_name_missing(patch, story):
     line = {'args': []}
     assert story.argument_by_name(line, 'foo') is None
@@ -242,6 +354,28 @@ def test_stories_prepare_context(story, app):
     assert story.context == context
 
 
+def test_stories_set_context_shares_app_context(story, app):
+    story.app = app
+    story.set_context(None)
+    assert story.context['app'] is app.app_context
+
+
+def test_stories_line_has_parent(story):
+    story.tree = {
+        '2': {'ln': '2', 'enter': '3', 'next': '3'},
+        '3': {'ln': '3', 'parent': '2', 'next': '4', 'enter': '4'},
+        '4': {'ln': '4', 'parent': '3', 'next': '5'},
+        '5': {'ln': '5'}
+    }
+
+    assert story.line_has_parent('2', story.line('3'))
+    assert story.line_has_parent('2', story.line('4'))
+    assert story.line_has_parent('3', story.line('4'))
+    assert not story.line_has_parent('4', story.line('3'))
+    assert not story.line_has_parent('2', story.line('5'))
+    assert not story.line_has_parent('10', story.line('5'))
+
+
 def test_stories_next_block_simple(patch, story):
     story.tree = {
         '2': {'ln': '2', 'enter': '3', 'next': '3'},
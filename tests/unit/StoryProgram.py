@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+from asyncy.StoryProgram import Line, StoryProgram
+from asyncy.processing import Lexicon
+
+
+def test_story_program_compile():
+    story = {
+        'tree': {
+            '1': {'ln': '1', 'method': 'for', 'enter': '2', 'next': '2',
+                  'exit': '3'},
+            '2': {'ln': '2', 'method': 'set', 'parent': '1', 'next': '3'},
+            '3': {'ln': '3', 'method': 'foo'}
+        },
+        'entrypoint': '1'
+    }
+
+    program = StoryProgram.compile(story)
+    assert program.entrypoint == '1'
+
+    one = program.tree['1']
+    two = program.tree['2']
+    three = program.tree['3']
+
+    assert isinstance(one, Line)
+    assert one == story['tree']['1']
+
+    assert one.handler == Lexicon.for_loop
+    assert two.handler == Lexicon.set
+    assert three.handler is None
+
+    assert one.next_line is two
+    assert one.enter_line is two
+    assert one.exit_line is three
+    assert one.parent_line is None
+    assert two.parent_line is one
+    assert three.next_line is None
+
+
+def test_story_program_ancestry_and_block_exits():
+    tree = {
+        '1': {'ln': '1', 'enter': '2', 'next': '2'},
+        '2': {'ln': '2', 'parent': '1', 'enter': '3', 'next': '3'},
+        '3': {'ln': '3', 'parent': '2', 'next': '4'},
+        '4': {'ln': '4', 'parent': '1', 'next': '5'},
+        '5': {'ln': '5'}
+    }
+
+    program = StoryProgram.compile({'tree': tree, 'entrypoint': '1'})
+    lines = program.tree
+
+    assert lines['3'].is_descendant_of(lines['1'])
+    assert lines['3'].is_descendant_of(lines['2'])
+    assert lines['4'].is_descendant_of(lines['1'])
+    assert not lines['4'].is_descendant_of(lines['2'])
+    assert not lines['1'].is_descendant_of(lines['1'])
+    assert not lines['5'].is_descendant_of(lines['1'])
+
+    assert lines['1'].block_exit is lines['5']
+    assert lines['2'].block_exit is lines['4']
+    assert lines['3'].block_exit is lines['4']
+    assert lines['4'].block_exit is lines['5']
+    assert lines['5'].block_exit is None
+
+
+def test_story_program_resolvers():
+    value = {'$OBJECT': 'path', 'paths': ['foo']}
+    item = {'$OBJECT': 'path', 'paths': ['bar']}
+    mutation = {
+        '$OBJECT': 'mutation',
+        'mutation': 'append',
+        'args': [{'$OBJECT': 'arg', 'name': 'item', 'arg': item}]
+    }
+    tree = {
+        '1': {'ln': '1', 'method': 'set', 'args': [value, mutation]},
+        '2': {'ln': '2', 'method': 'execute', 'args': [
+            {'$OBJECT': 'argument', 'name': 'x', 'argument': value}
+        ]}
+    }
+
+    program = StoryProgram.compile({'tree': tree, 'entrypoint': '1'})
+    assert len(program.resolvers) == 2
+    assert program.resolvers[id(value)]({'foo': 'a'}) == 'a'
+    assert program.resolvers[id(item)]({'bar': 'b'}) == 'b'
+
+
+def path(name):
+    return {'$OBJECT': 'path', 'paths': [name]}
+
+
+def test_story_program_group_calls():
+    def call(ln, next_line, args=(), name=None, **kwargs):
+        line = {'ln': ln, 'method': 'execute', 'service': 'http',
+                'args': [{'$OBJECT': 'arg', 'name': 'url', 'arg': arg}
+                         for arg in args],
+                'next': next_line}
+        if name is not None:
+            line['name'] = [name]
+        line.update(kwargs)
+        return line
+
+    tree = {
+        '1': call('1', '2', name='a'),
+        '2': call('2', '3', args=[path('x')], name='b'),
+        '3': call('3', '4', args=[path('a')], name='c'),
+        '4': call('4', '5', name='d'),
+        '5': {'ln': '5', 'method': 'set', 'next': '6'},
+        '6': call('6', '7', name='e'),
+        '7': call('7', '8', name='e'),
+        '8': {'ln': '8', 'method': 'when', 'enter': '9', 'next': '9'},
+        '9': call('9', '10', parent='8'),
+        '10': call('10', None, parent='8')
+    }
+
+    program = StoryProgram.compile({'tree': tree, 'entrypoint': '1'},
+                                   concurrent_calls=True)
+    lines = program.tree
+    assert lines['1'].concurrent_calls == (lines['1'], lines['2'])
+    assert lines['3'].concurrent_calls == (lines['3'], lines['4'])
+    for ln in ('2', '4', '5', '6', '7', '8', '9', '10'):
+        assert lines[ln].concurrent_calls is None
+
+    program = StoryProgram.compile({'tree': tree, 'entrypoint': '1'})
+    assert program.tree['1'].concurrent_calls is None
+
+
+def test_story_program_variables():
+    line = Line({
+        'service': 'client',
+        'args': [
+            {'$OBJECT': 'arg', 'name': 'a', 'arg': {
+                '$OBJECT': 'expression', 'values': [path('x'), {
+                    '$OBJECT': 'path',
+                    'paths': ['y', path('z')]
+                }]
+            }}
+        ],
+        'name': ['out', 'key'],
+        'output': ['stream']
+    })
+    reads, writes = StoryProgram.variables(line)
+    assert reads == {'client', 'x', 'y', 'z'}
+    assert writes == {'out', 'stream'}
+
+
+def test_story_program_pure_functions():
+    def function(ln, name, next_line):
+        return {'ln': ln, 'method': 'function', 'function': name,
+                'enter': str(int(ln) + 1), 'next': next_line}
+
+    mutation = {'$OBJECT': 'mutation', 'mutation': 'append', 'args': []}
+    tree = {
+        '1': function('1', 'pure', '3'),
+        '2': {'ln': '2', 'method': 'set', 'parent': '1', 'name': ['a']},
+        '3': function('3', 'calls_pure', '5'),
+        '4': {'ln': '4', 'method': 'call', 'parent': '3',
+              'function': 'pure', 'name': ['a']},
+        '5': function('5', 'executes', '7'),
+        '6': {'ln': '6', 'method': 'execute', 'parent': '5'},
+        '7': function('7', 'calls_impure', '9'),
+        '8': {'ln': '8', 'method': 'call', 'parent': '7',
+              'function': 'executes'},
+        '9': function('9', 'mutates', '11'),
+        '10': {'ln': '10', 'method': 'set', 'parent': '9',
+               'args': [{'$OBJECT': 'path', 'paths': ['a']}, mutation]},
+        '11': function('11', 'assigns_in_place', '13'),
+        '12': {'ln': '12', 'method': 'set', 'parent': '11',
+               'name': ['a', 'b']},
+        '13': function('13', 'calls_in_place', None),
+        '14': {'ln': '14', 'method': 'call', 'parent': '13',
+               'function': 'pure', 'name': ['items', '0']}
+    }
+    functions = {line['function']: ln for ln, line in tree.items()
+                 if line['method'] == 'function'}
+    program = StoryProgram.compile({'tree': tree, 'entrypoint': '1',
+                                    'functions': functions},
+                                   function_cache_size=10)
+    assert program.pure_functions == {'pure', 'calls_pure'}
+    assert program.function_results.maxsize == 10
+
+    program = StoryProgram.compile({'tree': tree, 'entrypoint': '1',
+                                    'functions': functions})
+    assert program.function_results is None
+    assert program.function_key('pure', {}) is None
+
+
+def test_story_program_function_key():
+    tree = {'1': {'ln': '1', 'method': 'function'}}
+    program = StoryProgram.compile({'tree': tree, 'entrypoint': '1',
+                                    'functions': {'f': '1'}},
+                                   function_cache_size=10)
+
+    key = program.function_key('f', {'a': [1, {'b': 'c'}]})
+    assert key == program.function_key('f', {'a': [1, {'b': 'c'}]})
+    assert key != program.function_key('f', {'a': [True, {'b': 'c'}]})
+    assert key != program.function_key('f', {'a': (1, {'b': 'c'})})
+    assert program.function_key('f', {'a': {1, 2}}) is None
+    assert program.function_key('g', {}) is None
+
+
+def test_story_program_copy_result():
+    value = {'a': [1]}
+    copied = StoryProgram.copy_result(value)
+    assert copied == value
+    assert copied['a'] is not value['a']
+    assert StoryProgram.copy_result('a') == 'a'
+
+
+def test_story_program_setters():
+    name = ['a', 'b']
+    tree = {'1': {'ln': '1', 'method': 'set', 'name': name}}
+    program = StoryProgram.compile({'tree': tree, 'entrypoint': '1'})
+    assert list(program.setters) == [id(program.tree['1']['name'])]
+
+    context = {'a': {}}
+    program.setters[id(program.tree['1']['name'])](context, 1)
+    assert context == {'a': {'b': 1}}
+
+
+def test_story_program_arguments():
+    item = {'$OBJECT': 'string', 'string': 'b'}
+    mutation = {'$OBJECT': 'mutation', 'mutation': 'append', 'args': [
+        {'$OBJECT': 'arg', 'name': 'item', 'arg': item},
+        {'$OBJECT': 'arg', 'name': 'item', 'arg': 'shadowed'}
+    ]}
+    tree = {'1': {'ln': '1', 'method': 'set', 'args': [path('a'), mutation]}}
+    program = StoryProgram.compile({'tree': tree, 'entrypoint': '1'})
+    assert program.arguments[id(program.tree['1'])] == {}
+    assert program.arguments[id(mutation)] == {'item': item}
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import time
+import uuid
+
+from asyncy.StoryRun import StoryRun
+
+from pytest import fixture
+
+
+@fixture
+def run(patch):
+    patch.object(StoryRun, 'pool', [])
+    return StoryRun.acquire()
+
+
+def test_story_run_init(run):
+    assert run.context is None
+    assert run.environment is None
+    assert run.results is None
+    assert run.stack == []
+    assert run.tmp_dir_created is False
+
+
+def test_story_run_execution_id(patch, run):
+    patch.object(uuid, 'uuid4', return_value='id')
+    assert run.execution_id == 'id'
+    assert run.execution_id == 'id'
+    uuid.uuid4.assert_called_once()
+
+
+def test_story_run_release(run):
+    run.context = {'foo': 'bar'}
+    run.environment = {}
+    run.results = {}
+    run.stack.append('1')
+    run.tmp_dir_created = True
+    run.execution_id = 'id'
+    run.release()
+
+    assert StoryRun.pool == [run]
+    assert StoryRun.acquire() is run
+    assert run.context is None
+    assert run.environment is None
+    assert run.results is None
+    assert run.stack == []
+    assert run.tmp_dir_created is False
+    assert run.execution_id != 'id'
+
+
+def test_story_run_release_pool_full(patch, run):
+    patch.object(StoryRun, 'pool_size', 0)
+    run.release()
+    assert StoryRun.pool == []
+
+
+def test_story_run_acquire_slice_start(patch, run):
+    run.release()
+    patch.object(time, 'time', return_value=10)
+    assert StoryRun.acquire().slice_start == 10
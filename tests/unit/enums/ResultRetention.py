@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from asyncy.enums.ResultRetention import ResultRetention
+
+
+def test_result_retention():
+    assert ResultRetention('off') == ResultRetention.OFF
+    assert ResultRetention.TIMINGS == 'timings'
+    assert ResultRetention.FULL.value == 'full'
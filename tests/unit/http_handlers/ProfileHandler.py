@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import json
+
+from asyncy.Apps import Apps
+from asyncy.http_handlers.ProfileHandler import ProfileHandler
+
+from pytest import fixture, mark
+
+
+@fixture
+def handler(patch, logger, magic):
+    handler = ProfileHandler(magic(), magic(), logger=logger)
+    patch.many(handler, ['finish', 'set_status', 'set_header'])
+    return handler
+
+
+@fixture
+def app(patch, magic):
+    app = magic()
+    app.profiler.report.return_value = [{'line': '1'}]
+    patch.object(Apps, 'apps', {'app_id': app})
+    return app
+
+
+def test_profile_handler_get(patch, handler, app):
+    patch.object(handler, 'get_argument',
+                 side_effect=lambda name, default=None:
+                 {'app': 'app_id', 'limit': '5'}[name])
+    handler.get()
+    app.profiler.report.assert_called_with(5)
+    handler.finish.assert_called_with(json.dumps({
+        'app_id': 'app_id',
+        'lines': [{'line': '1'}]
+    }, separators=(',', ':')))
+
+
+@mark.parametrize('app_id', ['app_id', 'unknown'])
+def test_profile_handler_not_profiling(patch, handler, app, app_id):
+    app.profiler = None
+    patch.object(handler, 'get_argument',
+                 side_effect=lambda name, default=None:
+                 {'app': app_id, 'limit': '5'}[name])
+
+    handler.get()
+    handler.set_status.assert_called_with(404, 'Not profiling this app')
+    handler.finish.assert_called_with()
+
+
+def test_profile_handler_delete(patch, handler, app):
+    patch.object(handler, 'get_argument', return_value='app_id')
+    handler.delete()
+    app.profiler.reset.assert_called()
+    handler.finish.assert_called_with()
@@ -1,18 +1,21 @@
 # -*- coding: utf-8 -*-
+import asyncio
 from unittest import mock
 from unittest.mock import MagicMock, Mock
 
 from asyncy import Metrics
 from asyncy.Exceptions import InvalidKeywordUsage, StoryscriptError
 from asyncy.Stories import Stories
+from asyncy.StoryProgram import StoryProgram
 from asyncy.Types import StreamingService
 from asyncy.constants.LineConstants import LineConstants
-from asyncy.constants.LineSentinels import LineSentinels
+from asyncy.constants.LineSentinels import LineSentinels, ReturnSentinel
 from asyncy.constants.ServiceConstants import ServiceConstants
 from asyncy.processing import Lexicon, Story
 from asyncy.processing.Mutations import Mutations
 from asyncy.processing.Services import Services
 from asyncy.utils.HttpUtils import HttpUtils
+from asyncy.utils.ReadOnlyDict import ReadOnlyDict
 
 import pytest
 from pytest import fixture, mark
@@ -29,12 +32,19 @@ def line():
 
 
 @fixture
-def story(patch, story):
-    patch.many(story, ['end_line', 'resolve',
-                       'context', 'next_block', 'line'])
+def story(patch, magic, story):
+    patch.many(story, ['end_line', 'resolve', 'next_block', 'line'])
+    story.context = magic()
     return story
 
 
+def test_lexicon_handler():
+    assert Lexicon.handler('elif') == Lexicon.if_condition
+    assert Lexicon.handler('mutation') == Lexicon.set
+    assert Lexicon.handler('return') == Lexicon.ret
+    assert Lexicon.handler('foo') is None
+
+
 @mark.parametrize('name', ['foo_var', None])
 @mark.asyncio
 async def test_lexicon_execute(patch, logger, story, line, async_mock, name):
@@ -45,7 +55,6 @@ async def test_lexicon_execute(patch, logger, story, line, async_mock, name):
 
     output = MagicMock()
     patch.object(Services, 'execute', new=async_mock(return_value=output))
-    patch.object(Lexicon, 'line_number_or_none')
     result = await Lexicon.execute(logger, story, line)
     Services.execute.mock.assert_called_with(story, line)
 
@@ -57,14 +66,13 @@ async def test_lexicon_execute(patch, logger, story, line, async_mock, name):
         story.end_line.assert_called_with(line['ln'],
                                           output=output,
                                           assign=None)
-    story.line.assert_called_with(line['next'])
-    assert result == Lexicon.line_number_or_none()
+    assert result == line['next']
 
 
 @mark.asyncio
 async def test_lexicon_execute_none(patch, logger, story, line, async_mock):
     line['enter'] = None
-    story.line.return_value = None
+    line['next'] = None
     patch.object(Services, 'execute', new=async_mock())
     result = await Lexicon.execute(logger, story, line)
     assert result is None
@@ -73,7 +81,6 @@ async def test_lexicon_execute_none(patch, logger, story, line, async_mock):
 @mark.asyncio
 async def test_lexicon_set(patch, logger, story):
     story.context = {}
-    patch.object(Lexicon, 'line_number_or_none')
     line = {'ln': '1', 'name': ['out'], 'args': ['values'], 'next': '2'}
     story.resolve.return_value = 'resolved'
     result = await Lexicon.set(logger, story, line)
@@ -81,14 +88,12 @@ async def test_lexicon_set(patch, logger, story):
     story.end_line.assert_called_with(
         line['ln'], assign={'paths': ['out'], '$OBJECT': 'path'},
         output='resolved')
-    story.line.assert_called_with(line['next'])
-    assert result == Lexicon.line_number_or_none()
+    assert result == line['next']
 
 
 @mark.asyncio
 async def test_lexicon_set_mutation(patch, logger, story):
     story.context = {}
-    patch.object(Lexicon, 'line_number_or_none')
     patch.object(Mutations, 'mutate')
     line = {
         'ln': '1',
@@ -107,10 +112,32 @@ async def test_lexicon_set_mutation(patch, logger, story):
     story.end_line.assert_called_with(
         line['ln'], assign={'paths': ['out'], '$OBJECT': 'path'},
         output='mutated_result')
-    story.line.assert_called_with(line['next'])
     Mutations.mutate.assert_called_with(line['args'][1],
                                         story.resolve(), story, line)
-    assert result == Lexicon.line_number_or_none()
+    logger.hot.assert_called_with('lexicon-mutation', 'mutated_result')
+    assert result == line['next']
+
+
+@mark.asyncio
+async def test_lexicon_set_mutation_read_only(patch, logger, story):
+    shared = ReadOnlyDict({'a': 1, 'b': 2})
+    story.context = {'app': shared}
+    story.resolve.return_value = shared
+    patch.object(story, 'argument_by_name', return_value='a')
+    line = {
+        'ln': '1',
+        'name': ['out'],
+        'args': [
+            {'$OBJECT': 'path', 'paths': ['app']},
+            {'$OBJECT': 'mutation', 'mutation': 'pop', 'args': []}
+        ],
+        'next': '2'
+    }
+    await Lexicon.set(logger, story, line)
+    story.end_line.assert_called_with(
+        line['ln'], assign={'paths': ['out'], '$OBJECT': 'path'}, output=1)
+    assert story.context['app'] == {'b': 2}
+    assert shared == {'a': 1, 'b': 2}
 
 
 @mark.asyncio
@@ -173,7 +200,7 @@ async def test_if_condition_1(patch, logger, magic):
     story = Stories(magic(), 'foo', logger)
 
     story.tree = tree
-    ret = await Lexicon.if_condition(logger, story, tree['1'])
+    ret = await Lexicon.if_condition(logger, story, story.tree['1'])
     assert ret is None
 
 
@@ -202,7 +229,7 @@ async def test_if_condition_2(patch, logger, magic):
     story = Stories(magic(), 'foo', logger)
 
     story.tree = tree
-    ret = await Lexicon.if_condition(logger, story, tree['1'])
+    ret = await Lexicon.if_condition(logger, story, story.tree['1'])
     assert ret == '3'
 
 
@@ -288,7 +315,7 @@ async def test_if_condition(patch, logger, magic, case):
     story = Stories(magic(), 'foo', logger)
 
     story.tree = tree
-    ret = await Lexicon.if_condition(logger, story, tree['1'])
+    ret = await Lexicon.if_condition(logger, story, story.tree['1'])
     assert ret == case[1]
 
 
@@ -310,7 +337,7 @@ async def test_break(logger, story, line, patch, valid_usage):
 def test_lexicon_unless(logger, story, line):
     story.context = {}
     result = Lexicon.unless_condition(logger, story, line)
-    logger.log.assert_called_with('lexicon-unless', line, story.context)
+    logger.hot.assert_called_with('lexicon-unless', line, story.context)
     story.resolve.assert_called_with(line['args'][0], encode=False)
     assert result == line['exit']
 
@@ -348,7 +375,10 @@ async def test_lexicon_for_loop(patch, logger, story, line,
     story.context = {'elements': ['one', 'two', 'three']}
     story.resolve.return_value = ['one', 'two', 'three']
     story.environment = {}
+    story.app.app_config.get_loop_concurrency.return_value = 1
     result = await Lexicon.for_loop(logger, story, line)
+    story.app.app_config.get_loop_concurrency \
+        .assert_called_with(story.name, line['ln'])
 
     if execute_block_return == LineSentinels.BREAK:
         assert iterated_over_items == ['one']
@@ -364,6 +394,88 @@ async def test_lexicon_for_loop(patch, logger, story, line,
     assert story.context.get('element') is None
 
 
+@mark.parametrize('execute_block_return',
+                  [LineSentinels.BREAK, LineSentinels.RETURN, None])
+@mark.asyncio
+async def test_lexicon_for_loop_parallel(patch, logger, story, line,
+                                         execute_block_return):
+    running = []
+    max_running = 0
+
+    async def execute_block(our_logger, our_story, our_line):
+        nonlocal max_running
+        assert our_logger == logger
+        assert our_story is not story
+        assert our_line == line
+        element = our_story.context['element']
+        running.append(element)
+        max_running = max(max_running, len(running))
+        await asyncio.sleep(0)
+        our_story.context['last'] = element
+        our_story.context[element] = True
+        running.remove(element)
+        if element == 'two':
+            return execute_block_return
+
+    patch.object(Lexicon, 'line_number_or_none')
+    patch.object(Story, 'execute_block', side_effect=execute_block)
+
+    line['output'] = ['element']
+    items = ['one', 'two', 'three', 'four']
+    story.context = {'elements': items, 'last': None}
+    story.resolve.return_value = items
+    story.app.app_config.get_loop_concurrency.return_value = 2
+    result = await Lexicon.for_loop(logger, story, line)
+
+    assert max_running == 2
+    assert story.context.get('element') is None
+    assert story.context['one'] is True
+    assert story.context['two'] is True
+    if execute_block_return is None:
+        assert story.context['last'] == 'four'
+        assert story.context['four'] is True
+        assert result == Lexicon.line_number_or_none(story.next_block(line))
+    else:
+        assert story.context['last'] == 'two'
+        assert 'four' not in story.context
+        if execute_block_return == LineSentinels.BREAK:
+            assert result == \
+                Lexicon.line_number_or_none(story.next_block(line))
+        else:
+            assert result == execute_block_return
+
+
+@mark.asyncio
+async def test_lexicon_for_loop_parallel_join(patch, logger, story, line):
+    async def execute_block(our_logger, our_story, our_line):
+        await asyncio.sleep(0)
+        if our_story.context['element'] == 'two':
+            our_story.context['found'] = True
+
+    patch.object(Story, 'execute_block', side_effect=execute_block)
+    line['output'] = ['element']
+    items = ['one', 'two', 'three']
+    story.context = {'found': False}
+    story.resolve.return_value = items
+    story.app.app_config.get_loop_concurrency.return_value = 2
+    await Lexicon.for_loop(logger, story, line)
+    assert story.context['found'] is True
+
+
+@mark.asyncio
+async def test_lexicon_for_loop_parallel_exc(patch, logger, story, line):
+    async def execute_block(our_logger, our_story, our_line):
+        raise StoryscriptError()
+
+    patch.object(Story, 'execute_block', side_effect=execute_block)
+    line['output'] = ['element']
+    story.context = {}
+    story.resolve.return_value = ['one', 'two']
+    story.app.app_config.get_loop_concurrency.return_value = 2
+    with pytest.raises(StoryscriptError):
+        await Lexicon.for_loop(logger, story, line)
+
+
 @mark.asyncio
 async def test_lexicon_execute_streaming_container(patch, story, async_mock):
     line = {
@@ -375,7 +487,6 @@ async def test_lexicon_execute_streaming_container(patch, story, async_mock):
     }
 
     patch.object(Services, 'start_container', new=async_mock())
-    patch.object(Lexicon, 'line_number_or_none')
     patch.many(story, ['end_line', 'line'])
     Metrics.container_start_seconds_total = Mock()
     ret = await Lexicon.execute(story.logger, story, line)
@@ -384,9 +495,7 @@ async def test_lexicon_execute_streaming_container(patch, story, async_mock):
         line['ln'], output=Services.start_container.mock.return_value,
         assign={'paths': line.get('output')})
     Metrics.container_start_seconds_total.labels().observe.assert_called_once()
-    story.line.assert_called_with(line['next'])
-    Lexicon.line_number_or_none.assert_called_with(story.line())
-    assert ret == Lexicon.line_number_or_none()
+    assert ret == line['next']
 
 
 @mark.asyncio
@@ -413,6 +522,38 @@ async def test_story_execute_function(patch, logger, story, async_mock):
         .assert_called_with(logger, story, story.function_line_by_name())
 
 
+@mark.asyncio
+async def test_lexicon_call_memoized(patch, logger, story, async_mock):
+    story.program = StoryProgram.compile({
+        'tree': {
+            '1': {'ln': '1', 'method': 'function', 'function': 'f',
+                  'args': [{'$OBJECT': 'arg', 'name': 'x'}], 'enter': '2'},
+            '2': {'ln': '2', 'method': 'return', 'parent': '1'}
+        },
+        'entrypoint': '1',
+        'functions': {'f': '1'}
+    }, function_cache_size=10)
+    line = {'ln': '3', 'function': 'f', 'name': ['y'], 'next': '4'}
+    patch.object(story, 'context_for_function_call',
+                 side_effect=lambda *args: {'x': 1})
+    patch.object(Story, 'execute_block',
+                 new=async_mock(return_value=ReturnSentinel([1])))
+    patch.many(Metrics, ['function_cache_hits', 'function_cache_misses'])
+    story.context = {}
+
+    assert await Lexicon.call(logger, story, line) == '4'
+    assert await Lexicon.call(logger, story, line) == '4'
+
+    Story.execute_block.mock.assert_called_once()
+    Metrics.function_cache_misses.labels.assert_called_with(
+        app_id=story.app.app_id, story_name=story.name, function='f')
+    Metrics.function_cache_hits.labels().inc.assert_called_once()
+    first = story.end_line.mock_calls[0][2]['output']
+    second = story.end_line.mock_calls[1][2]['output']
+    assert first == second == [1]
+    assert first is not second
+
+
 @mark.parametrize('service_name', ['http', 'unknown_service'])
 @mark.asyncio
 async def test_lexicon_when(patch, story, async_mock, service_name):
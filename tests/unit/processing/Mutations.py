@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from asyncy.Exceptions import StoryscriptError
 from asyncy.processing.Mutations import Mutations
+from asyncy.processing.mutations.ListMutations import ListMutations
+from asyncy.processing.mutations.NumberMutations import NumberMutations
 from asyncy.processing.mutations.StringMutations import StringMutations
 
 import pytest
@@ -32,6 +34,7 @@ def test_mutations_handler_exception(story, patch):
     def exc(*args):
         raise Exception()
 
+    patch.object(Mutations, 'handlers', new={})
     patch.object(StringMutations, 'replace', side_effect=exc)
     mutation = {
         'mutation': 'replace'
@@ -39,3 +42,79 @@ def test_mutations_handler_exception(story, patch):
 
     with pytest.raises(StoryscriptError):
         Mutations.mutate(mutation, 'string', story, None)
+
+
+def test_mutations_handler(patch):
+    patch.object(Mutations, 'handlers', new={})
+    assert Mutations.handler([], 'append') == ListMutations.append
+    assert Mutations.handler(True, 'increment') == NumberMutations.increment
+    assert Mutations.handler('a', 'foo') is None
+    assert Mutations.handlers == {
+        (list, 'append'): ListMutations.append,
+        (bool, 'increment'): NumberMutations.increment
+    }
+
+
+def test_mutations_list_unique(story):
+    value = [3, 1, 3, 2, 1, 1.0]
+    Mutations.mutate({'mutation': 'unique'}, value, story, None)
+    assert value == [3, 1, 2]
+
+
+def test_mutations_list_replace(patch, story):
+    patch.object(story, 'argument_by_name',
+                 side_effect=lambda mutation, name: {'item': 2,
+                                                     'by': 42}[name])
+    value = [2, 1, 2]
+    Mutations.mutate({'mutation': 'replace'}, value, story, None)
+    assert value == [42, 1, 42]
+
+
+def arguments(patch, story, **kwargs):
+    patch.object(story, 'argument_by_name',
+                 side_effect=lambda mutation, name: kwargs[name])
+
+
+def test_mutations_list_mean(story):
+    assert Mutations.mutate({'mutation': 'mean'}, [1, 2, 4.5], story,
+                            None) == 2.5
+
+
+@pytest.mark.parametrize('percent,expected', [
+    (0, 1), (50, 2.5), (100, 10), (25, 2), (90, 7)
+])
+def test_mutations_list_percentile(patch, story, percent, expected):
+    arguments(patch, story, percent=percent)
+    result = Mutations.mutate({'mutation': 'percentile'},
+                              [10, 1, 4, 2, 3, 2], story, None)
+    assert result == pytest.approx(expected)
+
+
+def test_mutations_list_histogram(patch, story):
+    arguments(patch, story, bins=3)
+    result = Mutations.mutate({'mutation': 'histogram'},
+                              [0, 9, 3, 1, 6, 5, 2.9], story, None)
+    assert result == [3, 2, 2]
+
+
+@pytest.mark.parametrize('value,expected', [
+    ([], [0, 0, 0]),
+    ([1, 1, 1], [3, 0, 0])
+])
+def test_mutations_list_histogram_no_range(patch, story, value, expected):
+    arguments(patch, story, bins=3)
+    result = Mutations.mutate({'mutation': 'histogram'}, value, story, None)
+    assert result == expected
+
+
+def test_mutations_list_statistics_empty(patch, story):
+    arguments(patch, story, percent=50)
+    assert Mutations.mutate({'mutation': 'mean'}, [], story, None) is None
+    assert Mutations.mutate({'mutation': 'percentile'}, [], story,
+                            None) is None
+
+
+def test_mutations_list_histogram_invalid(patch, story):
+    arguments(patch, story, bins=0)
+    with pytest.raises(StoryscriptError):
+        Mutations.mutate({'mutation': 'histogram'}, [1], story, None)
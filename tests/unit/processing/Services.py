@@ -6,18 +6,25 @@ from io import StringIO
 from unittest.mock import MagicMock, Mock
 
 from asyncy.Containers import Containers
-from asyncy.Exceptions import ArgumentTypeMismatchError, StoryscriptError
+from asyncy.Exceptions import ArgumentTypeMismatchError, \
+    ServiceSaturatedError, StoryscriptError
+from asyncy.Kubernetes import Kubernetes
+from asyncy.StoryProgram import StoryProgram
 from asyncy.Types import StreamingService
 from asyncy.constants import ContextConstants
 from asyncy.constants.LineConstants import LineConstants as Line, LineConstants
 from asyncy.constants.ServiceConstants import ServiceConstants
 from asyncy.entities.Multipart import FileFormField, FormField
+from asyncy.omg.ServiceOutputValidator import ServiceOutputValidator
 from asyncy.processing.Services import Command, Event, \
     Service, Services
+from asyncy.utils.Bulkhead import Bulkhead
 from asyncy.utils.HttpUtils import HttpUtils
+from asyncy.utils.SingleFlight import SingleFlight
+from asyncy.utils.TTLCache import TTLCache
 
 import pytest
-from pytest import mark
+from pytest import fixture, mark
 
 from tornado.gen import coroutine
 from tornado.httpclient import AsyncHTTPClient, HTTPRequest, HTTPResponse
@@ -25,6 +32,15 @@ from tornado.httpclient import AsyncHTTPClient, HTTPRequest, HTTPResponse
 import ujson
 
 
+@fixture
+def app(magic):
+    app = magic()
+    app.get_bulkhead.return_value = None
+    app.single_flight = None
+    app.get_cache_ttl.return_value = None
+    return app
+
+
 @mark.asyncio
 async def test_services_execute_execute_internal(story, async_mock):
     handler = async_mock(return_value='output')
@@ -519,6 +535,115 @@ async def test_services_execute_external_http(patch, story, async_mock):
     Services.start_container.mock.assert_called()
 
 
+@mark.asyncio
+async def test_services_in_bulkhead(story):
+    bulkhead = Bulkhead(1, 0)
+    story.app.get_bulkhead.return_value = bulkhead
+
+    async def call():
+        assert bulkhead.in_flight == 1
+        with pytest.raises(ServiceSaturatedError):
+            await Services.in_bulkhead(story, 'cups', call)
+        return 'output'
+
+    assert await Services.in_bulkhead(story, 'cups', call) == 'output'
+    assert bulkhead.in_flight == 0
+    story.app.get_bulkhead.assert_called_with('cups')
+
+
+@mark.asyncio
+async def test_services_call_external_bulkhead(patch, story, async_mock):
+    line = {Line.service: 'cups', Line.command: 'print'}
+    chain = deque([Service(name='cups'), Command(name='print')])
+    patch.object(Services, 'in_bulkhead', new=async_mock())
+    patch.object(Containers, 'exec', new=async_mock())
+
+    ret = await Services.call_external(story, line, chain, {'format': {}})
+    assert ret == Services.in_bulkhead.mock.return_value
+    _, service, call = Services.in_bulkhead.mock.call_args[0]
+    assert service == 'cups'
+    await call()
+    Containers.exec.mock.assert_called_with(
+        story.logger, story, line, 'cups', 'print')
+
+
+@mark.parametrize('key', [('get', 'url', 'GET', None), None])
+@mark.asyncio
+async def test_services_fetch_coalesced(patch, story, async_mock, key):
+    kwargs = {'method': 'GET'}
+    story.app.single_flight = SingleFlight()
+    patch.object(SingleFlight, 'do', new=async_mock())
+    patch.object(Services, 'in_bulkhead', new=async_mock())
+    patch.object(HttpUtils, 'fetch_with_retry', new=async_mock())
+
+    ret = await Services.fetch(story, 'geo', 'url', 'client', kwargs, key)
+    if key is not None:
+        assert ret == SingleFlight.do.mock.return_value
+        single_flight, actual_key, fetch = SingleFlight.do.mock.call_args[0]
+        assert single_flight is story.app.single_flight
+        assert actual_key == key
+        await fetch()
+    else:
+        assert ret == Services.in_bulkhead.mock.return_value
+        SingleFlight.do.mock.assert_not_called()
+
+    # Only the call which is made takes a slot of the bulkhead.
+    Services.in_bulkhead.mock.assert_called_once()
+    _, service, call = Services.in_bulkhead.mock.call_args[0]
+    assert service == 'geo'
+    await call()
+    HttpUtils.fetch_with_retry.mock.assert_called_with(
+        3, story.logger, 'url', 'client', kwargs)
+
+
+@mark.asyncio
+async def test_services_execute_http_cached(patch, story, async_mock):
+    chain = deque([Service(name='geo'), Command(name='lookup')])
+    command_conf = {'http': {'method': 'get', 'path': '/lookup'},
+                    'output': {'type': 'map'}}
+    story.app.responses = TTLCache(1024)
+    story.app.get_cache_ttl.return_value = 60
+    response = HTTPResponse(HTTPRequest(url='url'), 200,
+                            buffer=StringIO('{"a": [1]}'),
+                            headers={'Content-Type': 'application/json'})
+    patch.object(Containers, 'get_hostname',
+                 new=async_mock(return_value='geo'))
+    patch.object(HttpUtils, 'fetch_with_retry',
+                 new=async_mock(return_value=response))
+    patch.object(ServiceOutputValidator, 'raise_if_invalid')
+
+    first = await Services.execute_http(story, {}, chain, command_conf)
+    first['a'].append(2)
+    second = await Services.execute_http(story, {}, chain, command_conf)
+
+    assert second == {'a': [1]}
+    assert HttpUtils.fetch_with_retry.mock.call_count == 1
+    assert ServiceOutputValidator.raise_if_invalid.call_count == 1
+    story.app.get_cache_ttl.assert_called_with('geo', 'lookup', command_conf)
+    assert story.app.responses.size == len(b'{"a": [1]}')
+    assert ('lookup', 'http://geo:5000/lookup', 'GET', None) \
+        in story.app.responses
+
+
+@mark.asyncio
+async def test_services_execute_http_cached_saturated(patch, story,
+                                                      async_mock):
+    chain = deque([Service(name='geo'), Command(name='lookup')])
+    command_conf = {'http': {'method': 'get', 'path': '/lookup'}}
+    story.app.responses = TTLCache(1024)
+    story.app.responses.put(('lookup', 'http://geo:5000/lookup', 'GET', None),
+                            {'a': 1}, 1, 60)
+    story.app.get_cache_ttl.return_value = 60
+    bulkhead = Bulkhead(1, 0)
+    bulkhead.in_flight = 1
+    story.app.get_bulkhead.return_value = bulkhead
+    patch.object(Containers, 'get_hostname',
+                 new=async_mock(return_value='geo'))
+
+    assert await Services.execute_http(story, {}, chain, command_conf) \
+        == {'a': 1}
+
+
 class Writer:
     out = ''
 
@@ -602,6 +727,57 @@ def test_service_get_command_conf_simple(story):
     assert Services.get_command_conf(story, chain) == {'x': 'y'}
 
 
+@mark.asyncio
+async def test_services_describe_once_per_line(patch, story, async_mock):
+    program = StoryProgram.compile({
+        'tree': {
+            '1': {'ln': '1', Line.method: 'execute',
+                  Line.service: 'alpine', Line.command: 'echo'}
+        },
+        'entrypoint': '1'
+    })
+    line = program.tree['1']
+    chain = deque([Service(name='alpine'), Command(name='echo')])
+    patch.object(Services, 'resolve_chain', return_value=chain)
+    patch.object(Services, 'get_command_conf', return_value={'format': {}})
+    patch.object(Containers, 'get_container_name', return_value='alpine-1')
+    patch.object(Containers, 'start', new=async_mock())
+    patch.object(Services, 'call_external', new=async_mock())
+
+    await Services.execute(story, line)
+    await Services.execute(story, line)
+
+    assert Services.describe(story, line) == (chain, {'format': {}}, False)
+    Services.resolve_chain.assert_called_once()
+    Services.get_command_conf.assert_called_once()
+    Containers.get_container_name.assert_called_once()
+    Containers.start.mock.assert_called_with(story, line, 'alpine-1')
+
+
+@mark.asyncio
+async def test_services_get_hostname(patch, story, async_mock):
+    program = StoryProgram.compile({
+        'tree': {
+            '1': {'ln': '1', Line.method: 'execute',
+                  Line.service: 'alpine', Line.command: 'echo'}
+        },
+        'entrypoint': '1'
+    })
+    line = program.tree['1']
+    patch.object(Containers, 'get_container_name', return_value='alpine-1')
+    patch.object(Containers, 'get_hostname',
+                 new=async_mock(return_value='other'))
+    patch.object(Kubernetes, 'get_hostname', return_value='alpine')
+
+    assert await Services.get_hostname(story, line, 'alpine') == 'alpine'
+    assert await Services.get_hostname(story, line, 'alpine') == 'alpine'
+    Containers.get_container_name.assert_called_once()
+    Kubernetes.get_hostname.assert_called_with(story.app, 'alpine-1')
+
+    assert await Services.get_hostname(story, line, 'client') == 'other'
+    Containers.get_hostname.mock.assert_called_with(story, line, 'client')
+
+
 @mark.asyncio
 async def test_start_container_http(story):
     line = {
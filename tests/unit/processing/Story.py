@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import collections
 import time
 from unittest import mock
 
 from asyncy import Metrics
 from asyncy.Containers import Containers
-from asyncy.Exceptions import StoryscriptError, StoryscriptRuntimeError
+from asyncy.Exceptions import StoryTimeoutError, StoryscriptError, \
+    StoryscriptRuntimeError
 from asyncy.Stories import Stories
 from asyncy.constants import ContextConstants
 from asyncy.constants.LineSentinels import LineSentinels
@@ -13,7 +15,14 @@ from asyncy.processing import Lexicon, Story
 from asyncy.utils import Dict
 
 import pytest
-from pytest import mark
+from pytest import fixture, mark
+
+
+@fixture
+def app(magic):
+    app = magic()
+    app.get_story_timeout.return_value = None
+    return app
 
 
 def test_story_story(patch, app, logger):
@@ -30,7 +39,7 @@ async def test_story_execute(patch, app, logger, story, async_mock):
     story.prepare()
     await Story.execute(logger, story)
     assert Stories.first_line.call_count == 1
-    logger.log.assert_called_with('story-execution', None)
+    logger.hot.assert_called_with('story-execution', None)
     Story.execute_line.mock.assert_called_with(logger,
                                                story, Stories.first_line())
 
@@ -43,7 +52,8 @@ async def test_story_execute_escaping_sentinel(patch, app, logger,
     """
     patch.object(Story, 'execute_line', new=async_mock(
         return_value=LineSentinels.RETURN))
-    patch.object(Stories, 'first_line')
+    patch.object(Stories, 'first_line', return_value='1')
+    story.tree = {'1': {'ln': '1', 'method': 'return'}}
     story.prepare()
     with pytest.raises(StoryscriptRuntimeError):
         await Story.execute(logger, story)
@@ -51,7 +61,7 @@ async def test_story_execute_escaping_sentinel(patch, app, logger,
 
 @mark.asyncio
 async def test_story_execute_line_unknown_method(logger, story):
-    story.tree['1']['method'] = 'foo_method'
+    story.tree = {'1': {'ln': '1', 'method': 'foo_method'}}
     with pytest.raises(StoryscriptError):
         await Story.execute_line(logger, story, '1')
 
@@ -94,6 +104,116 @@ async def test_story_execute_line_generic(patch, logger, story,
     story.start_line.assert_called_with('1')
 
 
+@mark.parametrize('elapsed', [0.01, 0.1, 0.2])
+@mark.asyncio
+async def test_story_yield_slice(patch, story, async_mock, elapsed):
+    patch.object(asyncio, 'sleep', new=async_mock())
+    patch.object(time, 'time', side_effect=[elapsed, 1])
+    patch.many(Metrics, ['story_slice_seconds',
+                         'story_longest_slice_seconds'])
+    story.app.longest_slice = 0.15
+    story.run.slice_start = 0
+
+    await Story.yield_slice(story)
+
+    if elapsed < Story.slice_seconds:
+        asyncio.sleep.mock.assert_not_called()
+        assert story.run.slice_start == 0
+        return
+
+    asyncio.sleep.mock.assert_called_with(0)
+    assert story.run.slice_start == 1
+    Metrics.story_slice_seconds.labels.assert_called_with(
+        app_id=story.app.app_id)
+    Metrics.story_slice_seconds.labels().observe.assert_called_with(elapsed)
+    if elapsed > 0.15:
+        Metrics.story_longest_slice_seconds.labels().set \
+            .assert_called_with(elapsed)
+        assert story.app.longest_slice == elapsed
+    else:
+        Metrics.story_longest_slice_seconds.labels().set.assert_not_called()
+
+
+@mark.parametrize('fails', [True, False])
+@mark.asyncio
+async def test_story_execute_line_profiled(patch, logger, story, magic,
+                                           async_mock, fails):
+    def execute(*args):
+        if fails:
+            raise StoryscriptError()
+        return '2'
+
+    patch.object(Lexicon, 'execute', new=async_mock(side_effect=execute))
+    story.tree = {'1': {'ln': '1', 'method': 'execute', 'next': '2'}}
+    story.app.profiler = magic()
+
+    try:
+        await Story.execute_line(logger, story, '1')
+    except StoryscriptError:
+        assert fails
+
+    story.app.profiler.enter.assert_called_with(story, '1')
+    story.app.profiler.exit.assert_called_with(
+        story, story.app.profiler.enter.return_value)
+
+
+@mark.parametrize('concurrent', [True, False])
+@mark.asyncio
+async def test_story_execute_line_concurrent_calls(patch, logger, story,
+                                                   async_mock, concurrent):
+    patch.object(Story, 'execute_concurrently', new=async_mock())
+    patch.object(Lexicon, 'execute', new=async_mock(return_value='2'))
+    story.tree = {
+        '1': {'ln': '1', 'method': 'execute', 'next': '2'},
+        '2': {'ln': '2', 'method': 'execute'}
+    }
+    story.tree['1'].concurrent_calls = (story.tree['1'], story.tree['2'])
+
+    result = await Story.execute_line(logger, story, '1',
+                                      concurrent=concurrent)
+    if concurrent:
+        Story.execute_concurrently.mock.assert_called_with(
+            logger, story, story.tree['1'].concurrent_calls)
+        assert result == Story.execute_concurrently.mock.return_value
+    else:
+        Lexicon.execute.mock.assert_called_with(logger, story,
+                                                story.tree['1'])
+        assert result == '2'
+
+
+@mark.asyncio
+async def test_story_execute_concurrently(patch, logger, story):
+    story.tree = {
+        '1': {'ln': '1', 'method': 'execute', 'next': '2'},
+        '2': {'ln': '2', 'method': 'execute', 'next': '3'},
+        '3': {'ln': '3'}
+    }
+    story.context = {}
+    running = []
+    max_running = 0
+
+    async def execute_line(our_logger, fork, line_number, concurrent):
+        nonlocal max_running
+        assert our_logger == logger
+        assert fork is not story
+        assert fork.context is story.context
+        assert concurrent is False
+        running.append(line_number)
+        max_running = max(max_running, len(running))
+        await asyncio.sleep(0)
+        running.remove(line_number)
+        fork.context[f'out_{line_number}'] = line_number
+        return story.tree[line_number]['next']
+
+    patch.object(Story, 'execute_line', side_effect=execute_line)
+    lines = (story.tree['1'], story.tree['2'])
+    result = await Story.execute_concurrently(logger, story, lines)
+
+    assert result == '3'
+    assert max_running == 2
+    assert story.context == {'out_1': '1', 'out_2': '2'}
+
+
 @mark.asyncio
 @mark.parametrize('line_4_result', ['5', LineSentinels.RETURN,
                                     LineSentinels.BREAK])
@@ -152,8 +272,7 @@ async def test_story_execute_block(patch, logger, story,
             mock.call('3'),
             mock.call('4'),
             mock.call('5'),
-            mock.call('6'),
-            mock.call('1')
+            mock.call('6')
         ] == story.line.mock_calls
 
 
@@ -171,6 +290,7 @@ async def test_story_run(patch, app, logger, async_mock, magic):
     Story.story.assert_called_with(app, logger, 'story_name')
     Story.story.return_value.prepare.assert_called_with(None)
     Story.execute.mock.assert_called_with(logger, Story.story())
+    Story.story.return_value.release.assert_called_once()
 
     Metrics.story_run_total.labels.assert_called_with(app_id=app.app_id,
                                                       story_name='story_name')
@@ -199,6 +319,7 @@ async def test_story_run_metrics_exc(patch, app, logger, async_mock, magic):
     Story.story.assert_called_with(app, logger, 'story_name')
     Story.story.return_value.prepare.assert_called_with(None)
     Story.execute.mock.assert_called_with(logger, Story.story())
+    Story.story.return_value.release.assert_not_called()
 
     Metrics.story_run_total.labels.assert_called_with(app_id=app.app_id,
                                                       story_name='story_name')
@@ -274,3 +395,52 @@ async def test_story_execute_does_not_wrap(patch, story, async_mock):
     patch.object(story, 'line', return_value={'method': 'execute'})
     with pytest.raises(StoryscriptError):
         await Story.execute_line(story.logger, story, '10')
+
+
+@mark.asyncio
+async def test_story_run_tracked(patch, app, logger, async_mock):
+    app.runs = set()
+
+    async def execute(logger, story):
+        assert len(app.runs) == 1
+
+    patch.object(Story, 'execute', new=execute)
+    patch.object(Story, 'story')
+    await Story.run(app, logger, 'story_name')
+    assert app.runs == set()
+    app.get_story_timeout.assert_called_with('story_name')
+
+
+@mark.asyncio
+async def test_story_run_timeout(patch, app, logger):
+    app.runs = set()
+    app.get_story_timeout.return_value = 0.01
+    cancelled = []
+
+    async def execute(logger, story):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(story)
+            raise
+
+    patch.object(Story, 'execute', new=execute)
+    patch.object(Story, 'story')
+    with pytest.raises(StoryTimeoutError):
+        await Story.run(app, logger, 'story_name')
+    await asyncio.sleep(0)
+    assert cancelled == [Story.story()]
+    assert app.runs == set()
+    Story.story().release.assert_not_called()
+
+
+@mark.asyncio
+async def test_story_run_timeout_raised_by_story(patch, app, logger,
+                                                 async_mock):
+    app.get_story_timeout.return_value = 10
+    patch.object(Story, 'execute',
+                 new=async_mock(side_effect=asyncio.TimeoutError()))
+    patch.object(Story, 'story')
+    with pytest.raises(asyncio.TimeoutError) as e:
+        await Story.run(app, logger, 'story_name')
+    assert not isinstance(e.value, StoryTimeoutError)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+from asyncy.utils.Bulkhead import Bulkhead
+
+from pytest import mark
+
+
+@mark.asyncio
+async def test_bulkhead():
+    bulkhead = Bulkhead(2, 1)
+    order = []
+
+    async def call(name):
+        await bulkhead.acquire()
+        order.append(name)
+        await asyncio.sleep(0.01)
+        bulkhead.release()
+
+    tasks = [asyncio.ensure_future(call(name)) for name in 'abc']
+    await asyncio.sleep(0)
+    assert bulkhead.in_flight == 2
+    assert len(bulkhead.waiters) == 1
+    assert bulkhead.full()
+
+    await asyncio.gather(*tasks)
+    assert order == ['a', 'b', 'c']
+    assert bulkhead.in_flight == 0
+    assert not bulkhead.full()
+
+
+@mark.asyncio
+async def test_bulkhead_cancel_waiting():
+    bulkhead = Bulkhead(1, 2)
+    await bulkhead.acquire()
+    waiting = asyncio.ensure_future(bulkhead.acquire())
+    await asyncio.sleep(0)
+    waiting.cancel()
+    await asyncio.sleep(0)
+    assert len(bulkhead.waiters) == 0
+
+    bulkhead.release()
+    assert bulkhead.in_flight == 0
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from asyncy.utils.Constant import Constant
+
+
+def test_constant():
+    constant = Constant('foo')
+    assert constant.mutable is False
+    assert constant(None) == 'foo'
+
+
+def test_constant_mutable():
+    value = {'a': [1, {'b': 2}]}
+    constant = Constant(value)
+    assert constant.mutable is True
+
+    result = constant(None)
+    assert result == value
+    assert result is not value
+    assert result['a'] is not value['a']
+    assert result['a'][1] is not value['a'][1]
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from asyncy.utils import Dict
+from asyncy.utils.ReadOnlyDict import ReadOnlyDict
 
 import pytest
 
@@ -141,3 +142,29 @@ def test_dict_set_array_out_of_bounds():
 
     with pytest.raises(IndexError):
         Dict.set(a, ['a', '0'], 'foo')
+
+
+def test_dict_set_copy_on_write():
+    shared = ReadOnlyDict({'foo': {'bar': 'data'}, 'baz': 'data'})
+    a = {'app': shared}
+    Dict.set(a, ['app', 'baz'], 'string')
+    assert a == {'app': {'foo': {'bar': 'data'}, 'baz': 'string'}}
+    assert type(a['app']) is dict
+    assert shared == {'foo': {'bar': 'data'}, 'baz': 'data'}
+
+
+def test_dict_set_copy_on_write_list():
+    shared = ReadOnlyDict({'foo': 'data'})
+    a = {'items': [shared]}
+    Dict.set(a, ['items', '0', 'foo'], 'string')
+    assert a == {'items': [{'foo': 'string'}]}
+    assert shared == {'foo': 'data'}
+
+
+def test_dict_set_keeps_keys():
+    keys = ['a', 'b']
+    a = {}
+    Dict.set(a, keys, 1)
+    Dict.set(a, keys, 2)
+    assert keys == ['a', 'b']
+    assert a == {'a': {'b': 2}}
@@ -1,13 +1,15 @@
 # -*- coding: utf-8 -*-
 import asyncio
+import sys
 from unittest.mock import MagicMock
 
+from asyncy import Metrics
 from asyncy.utils.HttpUtils import HttpUtils
 
 import pytest
 from pytest import mark
 
-from tornado.httpclient import HTTPError
+from tornado.httpclient import AsyncHTTPClient, HTTPError
 
 
 def test_read_response_body_quietly(magic):
@@ -67,3 +69,51 @@ def test_add_params_to_url():
     assert HttpUtils.add_params_to_url('asyncy.com', {
         'a': 1, 'b': 'c'
     }) == 'asyncy.com?a=1&b=c'
+
+
+@mark.parametrize('pycurl', [True, False])
+def test_configure(patch, logger, magic, pycurl):
+    patch.object(AsyncHTTPClient, 'configure')
+    patch.object(HttpUtils, 'host_slots', new={'foo': None})
+    patch.object(HttpUtils, 'max_host_connections', new=0)
+    patch.dict(sys.modules, {'pycurl': magic() if pycurl else None})
+    HttpUtils.configure(logger, 100, 4)
+    assert AsyncHTTPClient.configure.call_args[1] == {'max_clients': 100}
+    assert HttpUtils.max_host_connections == 4
+    assert HttpUtils.host_slots == {}
+    if pycurl:
+        assert AsyncHTTPClient.configure.call_args[0] == \
+            ('tornado.curl_httpclient.CurlAsyncHTTPClient',)
+        logger.warn.assert_not_called()
+    else:
+        assert AsyncHTTPClient.configure.call_args[0] == (None,)
+        logger.warn.assert_called_once()
+
+
+@mark.asyncio
+async def test_fetch_host_connections(patch, magic):
+    patch.object(HttpUtils, 'max_host_connections', new=2)
+    patch.object(HttpUtils, 'host_slots', new={})
+    patch.object(Metrics, 'http_queue_seconds')
+    in_flight = []
+    most_in_flight = []
+
+    async def fetch(url, **kwargs):
+        in_flight.append(url)
+        most_in_flight.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(url)
+        return url
+
+    client = magic()
+    client.fetch = fetch
+    urls = ['http://a:5000/1', 'http://a:5000/2', 'http://a:5000/3',
+            'http://b/1']
+    results = await asyncio.gather(*[HttpUtils.fetch(url, client, {})
+                                     for url in urls])
+
+    assert results == urls
+    assert max(most_in_flight) == 3
+    assert most_in_flight[:3] == [1, 2, 3]
+    assert HttpUtils.host_slots == {}
+    assert Metrics.http_queue_seconds.observe.call_count == 4
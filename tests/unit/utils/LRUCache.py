@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from asyncy.utils.LRUCache import LRUCache
+
+from pytest import raises
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert len(cache) == 2
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.get('b', 'default') == 'default'
+    assert cache.get('c') == 3
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_lru_cache_put_existing():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.put('a', 3)
+    cache.put('c', 4)
+    assert cache.get('a') == 3
+    assert 'b' not in cache
+
+
+def test_lru_cache_maxsize():
+    with raises(AssertionError):
+        LRUCache(0)
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import copy
+import json
+
+from asyncy.utils.ReadOnlyDict import ReadOnlyDict
+
+from pytest import mark, raises
+
+
+@mark.parametrize('change', [
+    lambda d: d.__setitem__('foo', 'baz'),
+    lambda d: d.__delitem__('foo'),
+    lambda d: d.setdefault('bar', 'baz'),
+    lambda d: d.pop('foo'),
+    lambda d: d.popitem(),
+    lambda d: d.clear(),
+    lambda d: d.update({'bar': 'baz'})
+])
+def test_read_only_dict_change(change):
+    d = ReadOnlyDict({'foo': 'bar'})
+    with raises(TypeError):
+        change(d)
+    assert d == {'foo': 'bar'}
+
+
+def test_read_only_dict_copy():
+    d = ReadOnlyDict({'foo': 'bar'})
+    for c in (d.copy(), copy.copy(d), copy.deepcopy(d)):
+        assert type(c) is dict
+        assert c == d
+        c['foo'] = 'baz'
+    assert d['foo'] == 'bar'
+    assert json.dumps(d) == '{"foo": "bar"}'
@@ -10,3 +10,13 @@ def test_expression_invalid_type():
     with pytest.raises(Exception):
         assert Resolver.expression(
             {'expression': 'a', 'values': [b'asd']}, {}) == 1
+
+
+@pytest.mark.parametrize('result,values,expected', [
+    (1, [2, 3.5], 6.5),
+    ('a', [1, 'b', 2.0, True], 'a1b2.0True'),
+    (1, [2, 'a', 3, 4], '3a34'),
+    (1, [], 1)
+])
+def test_resolver_sum(result, values, expected):
+    assert Resolver.sum(result, values) == expected
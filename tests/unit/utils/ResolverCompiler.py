@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+from asyncy.Exceptions import StoryscriptRuntimeError
+from asyncy.utils.Constant import Constant
+from asyncy.utils.Dict import Dict
+from asyncy.utils.Resolver import Resolver
+from asyncy.utils.ResolverCompiler import ResolverCompiler
+
+import pytest
+from pytest import mark
+
+data = {
+    'a': 1,
+    'b': 'foo',
+    'l': [1, 2, 3],
+    'm': {'x': {'y': 2}}
+}
+
+
+def path(*paths):
+    return {'$OBJECT': 'path', 'paths': list(paths)}
+
+
+def expression(op, *values):
+    return {'$OBJECT': 'expression', 'expression': op,
+            'values': list(values)}
+
+
+@mark.parametrize('item', [
+    'literal',
+    {'$OBJECT': 'int', 'int': 10},
+    {'$OBJECT': 'string', 'string': 'hello {} {}',
+     'values': [path('a'), path('b')]},
+    path('m', {'$OBJECT': 'string', 'string': 'x'},
+         {'$OBJECT': 'string', 'string': 'y'}),
+    path('l', {'$OBJECT': 'range', 'range': {
+        'start': {'$OBJECT': 'int', 'int': 1}}}),
+    path('l', path('a')),
+    path('unknown', {'$OBJECT': 'int', 'int': 1}),
+    {'$OBJECT': 'list', 'items': [path('a'), {'$OBJECT': 'int', 'int': 2}]},
+    {'$OBJECT': 'dict', 'items': [[{'$OBJECT': 'string', 'string': 'k'},
+                                   path('b')]]},
+    expression('sum', path('a'), {'$OBJECT': 'int', 'int': 2}),
+    expression('sum', path('b'), path('a'), path('a')),
+    expression('greater', path('a'), {'$OBJECT': 'int', 'int': 0}),
+    expression('or', {'$OBJECT': 'boolean', 'boolean': False},
+               expression('equals', path('a'), path('a'))),
+    expression('and', {'$OBJECT': 'boolean', 'boolean': True},
+               {'$OBJECT': 'boolean', 'boolean': False}),
+    expression('not', path('a')),
+    expression('exponential', path('a'), {'$OBJECT': 'int', 'int': 3}),
+    {'$OBJECT': 'type_cast', 'type': {'type': 'string'},
+     'value': path('a')},
+    {'key': path('b')}
+])
+def test_compile(item):
+    assert ResolverCompiler.compile(item)(data) == \
+        Resolver.resolve(item, data)
+
+
+def test_compile_out_of_bounds():
+    with pytest.raises(StoryscriptRuntimeError):
+        ResolverCompiler.compile(
+            path('l', {'$OBJECT': 'int', 'int': 10}))(data)
+
+
+def test_compile_unsupported_expression():
+    compiled = ResolverCompiler.compile(expression('foo', path('a')))
+    with pytest.raises(AssertionError):
+        compiled(data)
+
+
+def test_compile_malformed(patch):
+    patch.object(Resolver, 'resolve')
+    item = {'$OBJECT': 'expression', 'expression': 'sum'}
+    result = ResolverCompiler.compile(item)(data)
+    Resolver.resolve.assert_called_with(item, data)
+    assert result == Resolver.resolve.return_value
+
+
+def test_compile_folds_constants(patch):
+    item = {'$OBJECT': 'list', 'items': [
+        expression('sum', {'$OBJECT': 'int', 'int': 1},
+                   {'$OBJECT': 'int', 'int': 2}),
+        {'$OBJECT': 'string', 'string': 'a{}', 'values': [
+            {'$OBJECT': 'boolean', 'boolean': True}]},
+        {'$OBJECT': 'dict', 'items': [[{'$OBJECT': 'string', 'string': 'k'},
+                                       {'$OBJECT': 'list', 'items': []}]]}
+    ]}
+    compiled = ResolverCompiler.compile(item)
+    assert isinstance(compiled, Constant)
+
+    patch.object(Resolver, 'resolve')
+    first = compiled(None)
+    assert first == [3, 'aTrue', {'k': []}]
+    first[2]['k'].append(1)
+    assert compiled(data) == [3, 'aTrue', {'k': []}]
+
+
+def test_compile_folds_context_free_parts_only():
+    compiled = ResolverCompiler.compile(
+        expression('sum', path('a'), expression(
+            'multiplication', {'$OBJECT': 'int', 'int': 2},
+            {'$OBJECT': 'int', 'int': 3})))
+    assert not isinstance(compiled, Constant)
+    assert compiled(data) == 7
+
+
+def test_compile_regexp():
+    compiled = ResolverCompiler.compile({'$OBJECT': 'regexp',
+                                         'regexp': '^a+$'})
+    assert isinstance(compiled, Constant)
+    assert compiled(data) is compiled({})
+    assert compiled(data).match('aa')
+
+
+def test_compile_constant_failing_at_runtime():
+    compiled = ResolverCompiler.compile(
+        expression('division', {'$OBJECT': 'int', 'int': 1},
+                   {'$OBJECT': 'int', 'int': 0}))
+    with pytest.raises(ZeroDivisionError):
+        compiled(data)
+
+
+@mark.parametrize('keys', [
+    ['x'],
+    ['b'],
+    ['m', 'x', 'z'],
+    ['new', 'key'],
+    ['l', '1'],
+    ['l', {'$OBJECT': 'int', 'int': 2}],
+    ['m', {'$OBJECT': 'string', 'string': 'k'}],
+    ['m', path('b')],
+    ['m', 'x', '3']
+])
+def test_compile_setter(keys):
+    expected = Constant.thaw(data)
+    Dict.set(expected, keys, 'value')
+
+    result = Constant.thaw(data)
+    ResolverCompiler.setter(keys)(result, 'value')
+    assert result == expected
+
+
+def test_compile_setter_invalid_index():
+    setter = ResolverCompiler.setter(['l', 'x'])
+    with pytest.raises(ValueError):
+        setter({'l': [1]}, 'value')
+    result = {'l': {}}
+    setter(result, 'value')
+    assert result == {'l': {'x': 'value'}}
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+from asyncy.utils.SingleFlight import SingleFlight
+
+import pytest
+from pytest import mark
+
+
+@mark.asyncio
+async def test_single_flight():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    results = await asyncio.gather(single_flight.do('a', call),
+                                   single_flight.do('a', call),
+                                   single_flight.do('b', call))
+    assert results == [2, 2, 2]
+    assert len(single_flight) == 0
+
+    assert await single_flight.do('a', call) == 3
+
+
+@mark.asyncio
+async def test_single_flight_exception():
+    single_flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0)
+        raise ValueError()
+
+    results = await asyncio.gather(single_flight.do('a', call),
+                                   single_flight.do('a', call),
+                                   return_exceptions=True)
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+
+@mark.asyncio
+async def test_single_flight_cancel_caller():
+    single_flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        return 'result'
+
+    first = asyncio.ensure_future(single_flight.do('a', call))
+    second = asyncio.ensure_future(single_flight.do('a', call))
+    await asyncio.sleep(0)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    assert await second == 'result'
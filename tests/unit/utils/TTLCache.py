@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import time
+
+from asyncy.utils.TTLCache import TTLCache
+
+
+def test_ttl_cache(patch):
+    patch.object(time, 'time', return_value=100)
+    cache = TTLCache(10)
+    cache.put('a', 'value', 4, 5)
+    assert cache.get('a') == 'value'
+    assert cache.size == 4
+
+    time.time.return_value = 105
+    assert cache.get('a', 'default') == 'default'
+    assert 'a' not in cache
+    assert cache.size == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(10)
+    cache.put('a', 1, 4, 60)
+    cache.put('b', 2, 4, 60)
+    cache.get('a')
+    cache.put('c', 3, 4, 60)
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.size == 8
+
+    cache.put('a', 4, 2, 60)
+    assert cache.size == 6
+    cache.put('d', 5, 11, 60)
+    assert 'd' not in cache
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
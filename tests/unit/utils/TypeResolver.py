@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import re
+
+from asyncy.Exceptions import TypeAssertionRuntimeError, TypeValueRuntimeError
+from asyncy.utils.TypeResolver import TypeResolver
+
+import pytest
+from pytest import mark
+
+
+def t(name, *values):
+    if len(values) == 0:
+        return {'type': name}
+    return {'type': name, 'values': list(values)}
+
+
+@mark.parametrize('type_,item,expected', [
+    (t('int'), '42', 42),
+    (t('int'), True, 1),
+    (t('float'), 1, 1.0),
+    (t('string'), 1, '1'),
+    (t('boolean'), 0, False),
+    (t('any'), {'a': 1}, {'a': 1}),
+    (t('string'), None, None),
+    (t('List', t('int')), [1, '2', True], [1, 2, 1]),
+    (t('List', t('string')), ['a', 'b'], ['a', 'b']),
+    (t('List', t('Map', t('string'), t('any'))),
+     [{'a': 1}, {'b': [2]}], [{'a': 1}, {'b': [2]}]),
+    (t('Map', t('string'), t('int')), {1: '2'}, {'1': 2}),
+    (t('Map', t('int'), t('boolean')), {}, {}),
+    (t('regex'), 'a+', re.compile('a+'))
+])
+def test_type_resolver_type_cast(type_, item, expected):
+    assert TypeResolver.type_cast(item, type_, None) == expected
+
+
+def test_type_resolver_type_cast_copies():
+    item = [{'a': 1}]
+    result = TypeResolver.type_cast(
+        item, t('List', t('Map', t('string'), t('int'))), None)
+    assert result == item
+    assert result is not item
+    assert result[0] is not item[0]
+
+
+def test_type_resolver_type_cast_errors():
+    with pytest.raises(TypeAssertionRuntimeError):
+        TypeResolver.type_cast(42, t('List', t('int')), None)
+
+    with pytest.raises(TypeValueRuntimeError):
+        TypeResolver.type_cast(['a'], t('List', t('int')), None)
+
+
+def test_type_resolver_parse_type(patch):
+    type_ = t('List', t('int'))
+    parsed = TypeResolver.parse_type(type_)
+    patch.object(TypeResolver, 'resolve_type')
+    assert TypeResolver.parse_type(type_) == parsed
+    TypeResolver.resolve_type.assert_not_called()